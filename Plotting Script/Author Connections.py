@@ -0,0 +1,58 @@
+import backend  # Before pyplot: selects the Agg backend when there is no display
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection
+
+import coauthors
+import export
+import style
+
+# Custom parameter settings
+sheet = coauthors.AUTHORS_SHEET  # "authors" (abbreviated names) or "All Author Data" (full names)
+top_k_components = None  # Draw only the k largest groups of co-authors (None: all)
+layout_method = 'auto'  # 'auto', 'force' or 'spectral'
+max_labels = 500  # Label at most this many authors, those with the most co-authors first
+save_path = 'Figure/fig6_Author Connections.png'  # Path to save the image
+node_colors = ('#F1F3E3', '#A8DCD1', style.PRIMARY, '#0B4F7C')  # Few to many co-authors
+edge_color = '#5DA0C7'  # Co-authorship line color
+font_family = 'serif'
+font_size = 8
+
+style.apply()
+
+# Build the co-authorship graph
+graph = coauthors.load_graph(sheet)
+if top_k_components:
+    graph, _ = coauthors.top_components(graph, top_k_components)
+degree = np.diff(graph.adjacency.indptr)
+pos = coauthors.layout(graph.adjacency, layout_method)
+
+# Create canvas
+fig, ax = plt.subplots(figsize=(13, 12))
+ax.axis('off')
+ax.set_aspect('equal')
+
+# All co-authorships as one collection, thicker for repeated collaborations
+edges = coauthors.upper_edges(graph.adjacency)
+ax.add_collection(LineCollection(
+    pos[np.stack([edges.row, edges.col], axis=1)],
+    colors=edge_color, linewidths=0.4 + 0.6 * (edges.data - 1), alpha=0.35, zorder=1
+))
+
+# Authors, colored and sized by their number of co-authors
+cmap = style.colormap(node_colors, 'coauthors')
+ax.scatter(pos[:, 0], pos[:, 1], s=20 + 8 * degree, c=degree, cmap=cmap,
+           edgecolors='#B8C4A8', linewidths=0.5, zorder=2)
+
+# Author names next to their node
+for i in np.argsort(-degree, kind='stable')[:max_labels].tolist():
+    ax.text(pos[i, 0] + 0.2, pos[i, 1], graph.names[i], fontsize=font_size, family=font_family,
+            va='center', zorder=3)
+
+ax.autoscale_view()
+
+# Save the image
+export.save_figure(plt.gcf(), save_path, dpi=300, bbox_inches='tight')
+
+# Display the chart
+backend.show()
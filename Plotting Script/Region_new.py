@@ -1,27 +1,32 @@
-import pandas as pd
+import backend  # Before pyplot: selects the Agg backend when there is no display
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 import numpy as np
 
+import export
+import style
+import workbook
+
 # ================= Configuration Area =================
-file_path = 'Data Table/Region_new.xlsx'
-sheet_name = 0
+table_name = 'Region_new'
 category_column = 'Region'
 score_column = 'Score'
 count_column = 'Number of papers'
 
 # Color Settings
-color_score = '#3E87BA'    # Dark blue (Left Axis - Score)
+color_score = style.PRIMARY    # Dark blue (Left Axis - Score)
 color_count = '#9AC9DB'    # Light blue (Right Axis - Paper Count)
 
 bar_width = 0.35           # Width of single bar
 font_size_labels = 12      # Axis label font size
-save_path = 'Region_Dual_Axis_Final.png'
+save_path = 'Figure/fig3_Publication Region.png'
 # ===========================================
 
+style.apply()
+
 # 1. Read Data
 try:
-    df = pd.read_excel(file_path, sheet_name=sheet_name)
+    df = workbook.load_table(table_name)
 except Exception as e:
     print(f"Failed to read file: {e}")
     exit()
@@ -90,6 +95,6 @@ ax2.bar_label(rects2, padding=2, fontsize=10, color=color_count, fmt='%.0f', fon
 
 # 11. Save and Display
 plt.tight_layout()
-plt.savefig(save_path, dpi=300)
+export.save_figure(plt.gcf(), save_path, dpi=300)
 print(f"Image saved as: {save_path}")
-plt.show()
\ No newline at end of file
+backend.show()
\ No newline at end of file
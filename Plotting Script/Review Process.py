@@ -0,0 +1,87 @@
+import backend  # Before pyplot: selects the Agg backend when there is no display
+import matplotlib.pyplot as plt
+
+import export
+import screening
+import style
+
+# Custom parameter settings
+save_path = 'Figure/fig1_Overview of review process.png'  # Path to save the image
+stage_color = '#DCEAF5'  # Stage box fill (light blue)
+stage_edge_color = style.PRIMARY  # Stage box border (light navy blue)
+excluded_color = '#F5F5F5'  # Exclusion box fill (light gray)
+excluded_edge_color = 'gray'  # Exclusion box border
+arrow_color = style.TEXT_COLOR  # Arrow color (dark gray)
+font_size = 11  # Box text font size
+
+style.apply()
+
+# Aggregate all review stages in one pass over the screening sheets
+counts = screening.prisma_counts()
+
+
+def reason_lines(reasons):
+    """One line per exclusion reason, largest first"""
+    return '\n'.join(f'{reason}: {count}' for reason, count in reasons.items())
+
+
+def draw_box(ax, x, y, text, facecolor, edgecolor, **kwargs):
+    """Draw a text box centred at (x, y) in axes coordinates and return it"""
+    return ax.text(
+        x, y, text,
+        ha='center', va='center',
+        fontsize=kwargs.pop('fontsize', font_size),
+        color=style.TEXT_COLOR,
+        bbox=dict(boxstyle='round,pad=0.6', facecolor=facecolor, edgecolor=edgecolor, linewidth=1.2),
+        transform=ax.transAxes,
+        **kwargs
+    )
+
+
+def connect(ax, start, end, **kwargs):
+    """Draw an arrow between two boxes, clipped to their borders"""
+    ax.annotate(
+        '', xy=end.get_position(), xytext=start.get_position(),
+        xycoords='axes fraction', textcoords='axes fraction',
+        arrowprops=dict(arrowstyle='-|>', color=arrow_color, linewidth=1.2,
+                        patchA=start.get_bbox_patch(), patchB=end.get_bbox_patch(), **kwargs)
+    )
+
+
+# Create canvas
+fig, ax = plt.subplots(figsize=(11, 10))
+ax.axis('off')
+
+# Main review stages (left column)
+sources = ', '.join(f'{source}: {count}' for source, count in counts['sources'].items())
+retrieved = draw_box(ax, 0.3, 0.9, f"Records retrieved from databases\n(n = {counts['retrieved']})\n{sources}",
+                     stage_color, stage_edge_color, fontweight='bold')
+candidates = draw_box(ax, 0.3, 0.62, f"Candidates after title/abstract screening\n(n = {counts['candidates']})",
+                      stage_color, stage_edge_color, fontweight='bold')
+selected = draw_box(ax, 0.3, 0.34, f"Papers selected after full-text review\n(n = {counts['selected']})",
+                    stage_color, stage_edge_color, fontweight='bold')
+connect(ax, retrieved, candidates)
+connect(ax, candidates, selected)
+
+# Excluded records with reasons (right column)
+screened_out = draw_box(ax, 0.78, 0.76,
+                        f"Excluded (n = {counts['screening_excluded']})\n{reason_lines(counts['screening_reasons'])}",
+                        excluded_color, excluded_edge_color, fontsize=font_size - 1)
+full_text_out = draw_box(ax, 0.78, 0.48,
+                         f"Excluded (n = {counts['full_text_excluded']})\n{reason_lines(counts['full_text_reasons'])}",
+                         excluded_color, excluded_edge_color, fontsize=font_size - 1)
+connect(ax, retrieved, screened_out, connectionstyle='angle,angleA=0,angleB=90')
+connect(ax, candidates, full_text_out, connectionstyle='angle,angleA=0,angleB=90')
+
+# Selected papers per type (bottom row)
+types = list(counts['types'].items())
+for i, (paper_type, count) in enumerate(types):
+    x = 0.3 + (i - (len(types) - 1) / 2) * 0.2
+    box = draw_box(ax, x, 0.1, f"Type {paper_type}\n{count} Papers", 'white', stage_edge_color)
+    connect(ax, selected, box)
+
+# Save the image
+export.save_figure(plt.gcf(), save_path, dpi=300, bbox_inches='tight')
+
+# Display the chart
+backend.show()
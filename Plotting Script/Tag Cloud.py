@@ -0,0 +1,113 @@
+import html
+import sys
+
+import backend  # Before pyplot: selects the Agg backend when there is no display
+import matplotlib.pyplot as plt
+
+import export
+import keywords
+
+# Custom parameter settings
+input_path = keywords.ABSTRACTS  # One abstract per line
+max_words = 50  # Number of keywords in the cloud
+exclude_words = []  # Extra words to leave out of the cloud, e.g. ['approach']
+show_counts = True  # Show the frequency next to each keyword
+html_path = 'Figure/Tag Cloud.htm'  # Path to save the HTML cloud
+save_path = 'Figure/fig8_Tag cloud of keywords.png'  # Path to save the image
+fig_width = 13  # Image width in inches
+base_font_size = 14  # Font size of the smallest keywords
+# Font size factor and color of each size class, smallest to largest
+size_factors = [1.0, 1.4, 1.8, 2.2, 2.6, 3.0, 3.3, 3.6, 3.9, 4.2, 4.5]
+class_colors = ['#ACC1F3', '#ACC1F3', '#86A0DC', '#86A0DC', '#607EC5', '#607EC5',
+                '#4C6DB9', '#395CAE', '#264CA2', '#133B97', '#002A8B']
+count_color = '#BBBBBB'  # Frequency label color
+count_font_size = 10  # Frequency label font size
+
+# Count the keywords (only abstracts added since the last run are tokenized)
+index = keywords.update_index(input_path)
+terms = keywords.top_terms(index, max_words, exclude=exclude_words)
+if not terms:
+    # Nothing to lay out (an empty file, or only stop words and excluded words)
+    sys.exit(f"No keywords left in '{input_path}' after removing stop words and exclude_words")
+classes = keywords.size_classes(terms, len(size_factors))
+
+# Cloud order is alphabetical, as in the published figure
+cloud = sorted(zip(terms, classes), key=lambda item: item[0][0].lower())
+
+# HTML cloud
+css_classes = ''.join(
+    f'.tagcloud{i}{{font-size:{factor}em;color:{color};z-index:{len(size_factors) - 1 - i}}}'
+    for i, (factor, color) in enumerate(zip(size_factors, class_colors))
+)
+words_html = ' '.join(
+    f'<span id="{i}" class="wrd tagcloud{size_class}">{html.escape(label)}'
+    + (f'<span class="freq">&nbsp;({count})</span>' if show_counts else '')
+    + '</span>'
+    for i, ((label, count), size_class) in enumerate(cloud)
+)
+export.save_file(
+    html_path,
+    '<style type="text/css">\n'
+    '#htmltagcloud{font-size:100%;width:auto;'
+    "font-family:'lucida grande','trebuchet ms',arial,helvetica,sans-serif;"
+    'background-color:#fff;margin:1em 1em 0 1em;border:2px dotted #ddd;padding:2em;'
+    'line-height:2.4em;text-align:justify}'
+    f'.wrd{{padding:0;position:relative}}{css_classes}'
+    f'.freq{{font-size:{count_font_size}pt !important;color:{count_color}}}\n'
+    '</style>\n'
+    f'<div id="htmltagcloud"> {words_html} </div>\n'
+)
+
+# Create canvas; the height follows from the word layout below
+fig = plt.figure(figsize=(fig_width, 1))
+renderer = fig.canvas.get_renderer()
+margin = 0.2  # inches
+gap = 0.12  # inches between a keyword and its count, and between entries
+
+
+def width_of(text):
+    """Rendered width of a text artist in inches"""
+    return text.get_window_extent(renderer).width / fig.dpi
+
+
+# Measure every keyword (and its count) once
+entries = []
+for (label, count), size_class in cloud:
+    font_size = base_font_size * size_factors[size_class]
+    word = fig.text(0, 0, label, fontsize=font_size, color=class_colors[size_class],
+                    va='baseline', transform=fig.dpi_scale_trans)
+    freq = fig.text(0, 0, f'({count})', fontsize=count_font_size, color=count_color,
+                    va='baseline', transform=fig.dpi_scale_trans) if show_counts else None
+    word_width = width_of(word)
+    width = word_width + (gap + width_of(freq) if freq else 0)
+    entries.append((word, freq, word_width, width, font_size / 72))
+
+# Flow the entries into lines
+line_width = fig_width - 2 * margin
+lines = [[]]
+for entry in entries:
+    used = sum(e[3] for e in lines[-1]) + gap * len(lines[-1])
+    if lines[-1] and used + entry[3] > line_width:
+        lines.append([])
+    lines[-1].append(entry)
+
+# Place each line on a common baseline; all lines but the last are justified
+line_heights = [1.35 * max(e[4] for e in line) for line in lines]
+fig.set_size_inches(fig_width, sum(line_heights) + 2 * margin)
+y = sum(line_heights) + margin
+for i, (line, height) in enumerate(zip(lines, line_heights)):
+    y -= height
+    spare = line_width - sum(e[3] for e in line)
+    spacing = spare / (len(line) - 1) if len(line) > 1 and i < len(lines) - 1 else gap
+    x = margin
+    for word, freq, word_width, width, _ in line:
+        word.set_position((x, y + 0.25 * height))
+        if freq:
+            freq.set_position((x + word_width + gap, y + 0.25 * height))
+        x += width + spacing
+
+# Save the image
+export.save_figure(plt.gcf(), save_path, dpi=300, facecolor='white')
+
+# Display the chart
+backend.show()
@@ -1,9 +1,13 @@
+import backend  # Before pyplot: selects the Agg backend when there is no display
 import matplotlib.pyplot as plt
 import pandas as pd
 
-# Read Excel data
-excel_path = "Data Table/Technology Score.xlsx"
-df = pd.read_excel(excel_path)
+import export
+import text_batch
+import workbook
+
+# Read data from the master workbook
+df = workbook.load_table("Technology Score")
 
 # Column name validation and cleaning
 required_columns = ['Technologies','Learnability','Expressiveness','Collaboration','Toolchain','Scalability','Cost & Resources']
@@ -28,25 +32,22 @@ df = df.sort_values(by='Total', ascending=True).reset_index(drop=True)
 tech_map = {tech:i for i,tech in enumerate(df['Technologies'])}
 dim_map = {dim:i for i,dim in enumerate(dimensions)}
 
-# Create plotting data
-plot_data = []
-for _, row in df.iterrows():
-    for dim in dimensions:
-        plot_data.append({
-            'x': dim_map[dim],
-            'y': tech_map[row['Technologies']],
-            'size': row[dim],
-            'score': row[dim],
-            'tech': row['Technologies'],
-            'total': row['Total']
-        })
-df_plot = pd.DataFrame(plot_data)
+# Create plotting data (long form: one row per technology and dimension, ordered by technology)
+df_plot = df.melt(id_vars=['Technologies', 'Total'], value_vars=dimensions,
+                  var_name='dim', value_name='score')
+df_plot = df_plot.rename(columns={'Technologies': 'tech', 'Total': 'total'})
+df_plot['x'] = df_plot['dim'].map(dim_map)
+df_plot['y'] = df_plot['tech'].map(tech_map)
+df_plot['size'] = df_plot['score']
+df_plot = df_plot.sort_values(['y', 'x'], kind='stable').reset_index(drop=True)
 
 # Chart parameter settings
 plt.figure(figsize=(10, 7.5))
 ax = plt.gca()
 BUBBLE_BASE_SIZE = 350
 TOTAL_SCORE_X = -0.60
+MAX_BUBBLE_LABELS = 300  # Above this many bubbles, labels would overlap: scores are encoded by color instead
+label_bubbles = len(df_plot) <= MAX_BUBBLE_LABELS
 
 # Plot bubble chart
 sc = ax.scatter(
@@ -57,24 +58,27 @@ sc = ax.scatter(
     edgecolor='black',
     linewidth=0.8,
     alpha=0.85,
-    zorder=2
+    zorder=2,
+    **({} if label_bubbles else {'c': df_plot['score'], 'cmap': 'Blues'})
 )
 
-# Add score labels
-for _, row in df_plot.iterrows():
-    ax.text(
-        row['x'], row['y'],
-        str(row['score']),
+if label_bubbles:
+    # Add score labels, all drawn by one artist
+    text_batch.add_texts(
+        ax, df_plot['x'].tolist(), df_plot['y'].tolist(), df_plot['score'].astype(str).tolist(),
         ha='center', va='center',
         fontsize=10,
         fontweight='bold',
         color='white',
         zorder=3
     )
+else:
+    # Too many bubbles to label: show the score as a color scale
+    cbar = plt.colorbar(sc, ax=ax, pad=0.01)
+    cbar.set_label('Score', rotation=270, labelpad=15)
 
-# Add total score column
-for tech, idx in tech_map.items():
-    total = df[df['Technologies'] == tech]['Total'].values[0]
+# Add total score column (rows are in technology order, so the row index is the y position)
+for idx, total in zip(df.index.tolist(), df['Total'].tolist()):
     ax.text(
         TOTAL_SCORE_X, idx,
         f"{total}",
@@ -132,5 +136,5 @@ plt.subplots_adjust(
 )
 
 # Save chart
-plt.savefig("technologies_bubble_chart2.png", dpi=300, bbox_inches='tight')
-plt.show()
\ No newline at end of file
+export.save_figure(plt.gcf(), "Figure/fig10_Technology Score.png", dpi=300, bbox_inches='tight')
+backend.show()
\ No newline at end of file
@@ -1,111 +1,66 @@
+import backend  # Before pyplot: selects the Agg backend when there is no display
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-import colorsys
 from matplotlib.path import Path
-from matplotlib.patches import PathPatch
+from matplotlib.collections import PathCollection
 import os
-from datetime import datetime
 
-# Set Chinese font support
-# plt.rcParams["font.family"] = ["Times New Roman", "serif"]
-plt.rcParams['axes.unicode_minus'] = False  # Fix negative sign display issue
+import export
+import profiling
+import style
+import trends
+import workbook
 
+# Shared rcParams (plain minus sign), fonts and palettes
+style.apply()
 
-def read_and_process_data(file_path):
-    """Read Excel file and process data"""
-    # Read Excel file
-    df = pd.read_excel(file_path)
+# Year ranges of the chart (left-closed, right-open bins, or rolling windows)
+year_bins = None  # Bin edges, e.g. [2010, 2015, 2020, 2025]; None: bins of bin_width years covering every paper
+bin_width = 5  # Years per bin when year_bins is None
+rolling_window = None  # Years per rolling window (one window ending in every year), e.g. 3; replaces the bins
 
-    # Data cleaning: Remove null values in Publication Year or Topic columns
-    df = df.dropna(subset=['Publication Year', 'Topic'])
 
-    # Convert Publication Year to integer type
-    df['Publication Year'] = df['Publication Year'].astype(int)
+@profiling.profiled('transform')
+def read_and_process_data(df):
+    """Topic counts per year range of the topic table loaded from the master workbook"""
+    # Papers per year and topic as cumulative counts; every year range is the difference of two rows
+    yearly = trends.from_table(df, 'Publication Year', 'Topic', 'Number of papers')
+    topic_trend = trends.trend(yearly, year_bins, rolling_window, bin_width)
+    if topic_trend.excluded:
+        print(f"Note: {topic_trend.excluded} papers are outside the year bins {year_bins}")
+    return topic_trend, topic_trend.labels
 
-    # Create year range mapping - 5-year intervals (left-closed, right-open)
-    year_bins = [2010, 2015, 2020, 2025]  # Intervals: [2010,2015), [2015,2020), [2020,2025)
-    year_labels = [f"{start}-{end - 1}" for start, end in zip(year_bins[:-1], year_bins[1:])]
 
-    # Map years to corresponding intervals
-    df['Year Range'] = pd.cut(df['Publication Year'], bins=year_bins, labels=year_labels, right=False)
-
-    # Remove data outside the specified year range
-    df = df.dropna(subset=['Year Range'])
-
-    # Count number of papers per topic in each year range
-    topic_counts = df.groupby(['Year Range', 'Topic']).size().reset_index(name='Count')
-
-    return topic_counts, year_labels
-
-
-def generate_colors(num_colors):
-    """Generate similar, low-key and sophisticated color scheme"""
-    # Use different shades of the same color system
-    base_hue = 210 / 360  # Blue color system
-    base_saturation = 0.7
-
-    colors = []
-    for i in range(num_colors):
-        # Adjust lightness and saturation on the same hue
-        lightness = 0.9 - (i % 5) * 0.15  # Vary between 0.9-0.15
-        saturation = base_saturation - (i // 5) * 0.1  # Vary between 0.7-0.4
-
-        # Convert HLS to RGB using colorsys module
-        r, g, b = colorsys.hls_to_rgb(base_hue, lightness, max(0.3, saturation))
-        colors.append(mcolors.rgb2hex((r, g, b)))
-
-    return colors
+@profiling.profiled('transform')
+def create_flow_data(topic_trend, year_labels):
+    """Create flow data"""
+    # Topic x year-range count matrix (topics sorted alphabetically), without topics that have no papers
+    count_matrix = pd.DataFrame(topic_trend.counts, index=topic_trend.categories, columns=year_labels)
+    count_matrix = count_matrix[count_matrix.sum(axis=1) > 0]
+    all_topics = count_matrix.index.tolist()
 
+    # Create topic-color mapping (ramps are memoized by size in style.py)
+    topic_colors = dict(zip(all_topics, style.color_ramp(len(all_topics))))
 
-def create_flow_data(topic_counts, year_labels):
-    """Create flow data"""
-    # Get all unique topics
-    all_topics = sorted(topic_counts['Topic'].unique())
-    num_topics = len(all_topics)
-
-    # Create mapping from year range to index
-    year_to_idx = {year: i for i, year in enumerate(year_labels)}
-
-    # Create topic-color mapping
-    topic_colors = dict(zip(all_topics, generate_colors(num_topics)))
-
-    # Initialize flow data structure
-    flow_data = []
-
-    # Create flow for each topic
-    for topic in all_topics:
-        # Get paper counts of the topic in each year range
-        topic_data = topic_counts[topic_counts['Topic'] == topic].copy()
-
-        # Add 0-count records for missing year ranges of the topic
-        for year in year_labels:
-            if year not in topic_data['Year Range'].values:
-                topic_data = pd.concat([topic_data, pd.DataFrame({
-                    'Year Range': [year],
-                    'Topic': [topic],
-                    'Count': [0]
-                })])
-
-        # Sort by year
-        topic_data = topic_data.sort_values('Year Range')
-
-        # Store flow data for the topic
-        flow_data.append({
-            'topic': topic,
-            'counts': [topic_data[topic_data['Year Range'] == year]['Count'].values[0] for year in year_labels],
-            'color': topic_colors[topic]
-        })
+    # Store flow data for each topic
+    flow_data = [
+        {'topic': topic, 'counts': counts, 'color': topic_colors[topic]}
+        for topic, counts in zip(all_topics, count_matrix.to_numpy().tolist())
+    ]
 
     return flow_data, topic_colors, year_labels
 
 
+@profiling.profiled('render')
 def plot_topic_trend(flow_data, topic_colors, year_labels, output_path):
     """Plot topic trend chart"""
+    # Topic x year-range count matrix
+    counts = np.array([data['counts'] for data in flow_data], dtype=float).reshape(len(flow_data), len(year_labels))
+    n_topics, n_ranges = counts.shape
+
     # Calculate maximum paper count for chart height determination
-    max_count = max(max(data['counts']) for data in flow_data)
-    total_topics = len(flow_data)
+    max_count = counts.max() if counts.size else 0
 
     # Create canvas
     fig, ax = plt.subplots(figsize=(18, 11))  # Increase height to accommodate more topics
@@ -114,57 +69,54 @@ def plot_topic_trend(flow_data, topic_colors, year_labels, output_path):
     # Define x-axis positions for year ranges
     x_positions = np.linspace(0, 1, len(year_labels))
 
-    # Calculate starting position for each topic area
-    topic_positions = {}
-    current_y = 0
-
-    for i, data in enumerate(flow_data):
-        counts = data['counts']
-        start_value = counts[0]
-        topic_positions[data['topic']] = current_y + start_value / 2
-        current_y += start_value
-
-    # Plot flow paths
-    for i, data in enumerate(flow_data):
-        topic = data['topic']
-        counts = data['counts']
-        color = data['color']
-
-        # Plot flow between year ranges for each topic
-        for j in range(len(year_labels) - 1):
-            x_start = x_positions[j]
-            x_end = x_positions[j + 1]
-            y_start = sum(d['counts'][j] for d in flow_data[:i]) + counts[j] / 2
-            y_end = sum(d['counts'][j + 1] for d in flow_data[:i]) + counts[j + 1] / 2
-
-            # Create Bezier curve path
-            verts = [
-                (x_start, y_start - counts[j] / 2),  # Start point
-                (x_start + (x_end - x_start) / 3, y_start - counts[j] / 2),  # First control point
-                (x_end - (x_end - x_start) / 3, y_end - counts[j + 1] / 2),  # Second control point
-                (x_end, y_end - counts[j + 1] / 2),  # End point
-                (x_end, y_end + counts[j + 1] / 2),  # End point
-                (x_end - (x_end - x_start) / 3, y_end + counts[j + 1] / 2),  # Second control point
-                (x_start + (x_end - x_start) / 3, y_start + counts[j] / 2),  # First control point
-                (x_start, y_start + counts[j] / 2),  # Start point
-                (x_start, y_start - counts[j] / 2),  # Closing point
-            ]
-
-            codes = [
-                Path.MOVETO,
-                Path.CURVE4,
-                Path.CURVE4,
-                Path.CURVE4,
-                Path.LINETO,
-                Path.CURVE4,
-                Path.CURVE4,
-                Path.CURVE4,
-                Path.CLOSEPOLY,
-            ]
-
-            path = Path(verts, codes)
-            patch = PathPatch(path, facecolor=color, alpha=0.8, edgecolor='none')
-            ax.add_patch(patch)
+    # Stack topics: the lower edge of each topic in each year range is the
+    # cumulative count of all topics before it (exclusive cumulative sum)
+    lower = np.cumsum(counts, axis=0) - counts
+    upper = lower + counts
+
+    # Calculate label position for each topic area (middle of its first year range)
+    topic_positions = dict(zip((data['topic'] for data in flow_data), lower[:, 0] + counts[:, 0] / 2))
+
+    # Build all flow paths at once: one Bezier ribbon per topic and pair of adjacent year ranges
+    x_start = x_positions[:-1]
+    x_end = x_positions[1:]
+    step = (x_end - x_start) / 3
+    verts = np.empty((n_topics, max(n_ranges - 1, 0), 9, 2))
+    verts[..., 0] = np.stack([
+        x_start,         # Start point
+        x_start + step,  # First control point
+        x_end - step,    # Second control point
+        x_end,           # End point
+        x_end,           # End point
+        x_end - step,    # Second control point
+        x_start + step,  # First control point
+        x_start,         # Start point
+        x_start,         # Closing point
+    ], axis=-1)
+    verts[..., 1] = np.stack([
+        lower[:, :-1], lower[:, :-1], lower[:, 1:], lower[:, 1:],
+        upper[:, 1:], upper[:, 1:], upper[:, :-1], upper[:, :-1],
+        lower[:, :-1],
+    ], axis=-1)
+
+    codes = [
+        Path.MOVETO,
+        Path.CURVE4,
+        Path.CURVE4,
+        Path.CURVE4,
+        Path.LINETO,
+        Path.CURVE4,
+        Path.CURVE4,
+        Path.CURVE4,
+        Path.CLOSEPOLY,
+    ]
+
+    # Plot all flow paths as a single collection with per-path face colors
+    paths = [Path(ribbon, codes) for ribbon in verts.reshape(-1, 9, 2)]
+    face_colors = np.repeat([data['color'] for data in flow_data], verts.shape[1])
+    ax.add_collection(PathCollection(paths, facecolors=face_colors, edgecolors='none', alpha=0.8), autolim=False)
+    if n_ranges > 1:
+        ax.set_xlim(x_positions[0], x_positions[-1])  # Flows span the full width without margins
 
     # Add year labels
     ax.set_xticks(x_positions)
@@ -180,8 +132,8 @@ def plot_topic_trend(flow_data, topic_colors, year_labels, output_path):
         ax.text(-0.05, y_pos, topic, fontsize=10, ha='right', va='center',
                 color='black', fontweight='bold', bbox=dict(facecolor=color, alpha=0.3, pad=2))
 
-    # Set y-axis range
-    ax.set_ylim(0, sum(d['counts'][0] for d in flow_data) + max_count * 0.1)
+    # Set y-axis range (up to the tallest stack)
+    ax.set_ylim(0, (counts.sum(axis=0).max() if counts.size else 0) + max_count * 0.1)
 
     # Set background and borders
     ax.set_facecolor('#f8f9fa')
@@ -194,7 +146,7 @@ def plot_topic_trend(flow_data, topic_colors, year_labels, output_path):
     ax.grid(axis='y', linestyle='--', alpha=0.7)
 
     # Save the chart
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    export.save_figure(fig, output_path, dpi=300, bbox_inches='tight')
     print(f"Chart saved to: {output_path}")
 
 
@@ -202,35 +154,31 @@ def main():
     """Main function"""
     print("Starting to generate literature topic trend chart...")
 
-    # Fixed Excel file name
-    file_path = "Data Table/Topic Trends.xlsx"
+    # Master workbook holding the "topic trends" sheet
+    file_path = workbook.MASTER_WORKBOOK
 
     # Check if file exists
     if not os.path.exists(file_path):
         print(f"Error: File '{file_path}' does not exist!")
         return
 
-    try:
-        # Read and process data
-        print("Reading and processing data...")
-        topic_counts, year_labels = read_and_process_data(file_path)
-
-        # Create flow data
-        print("Preparing visualization data...")
-        flow_data, topic_colors, year_labels = create_flow_data(topic_counts, year_labels)
+    # Read and process data
+    print("Reading and processing data...")
+    topic_trend, year_labels = read_and_process_data(workbook.load_table('Topic Trends', file_path))
 
-        # Generate output file name
-        output_path = f"literature_topic_trend_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+    # Create flow data
+    print("Preparing visualization data...")
+    flow_data, topic_colors, year_labels = create_flow_data(topic_trend, year_labels)
 
-        # Plot topic trend chart
-        print("Generating visualization chart...")
-        plot_topic_trend(flow_data, topic_colors, year_labels, output_path)
+    # Stable output file name, so an unchanged chart is not written again
+    output_path = "Figure/fig7_Topic Trends.png"
 
-        print("=" * 50)
-        print("Literature topic trend visualization completed!")
+    # Plot topic trend chart
+    print("Generating visualization chart...")
+    plot_topic_trend(flow_data, topic_colors, year_labels, output_path)
 
-    except Exception as e:
-        print(f"Error occurred: {e}")
+    print("=" * 50)
+    print("Literature topic trend visualization completed!")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+"""
+Matplotlib backend selection for the figure scripts.
+
+Import this module before ``matplotlib.pyplot``. Without a display (no ``DISPLAY`` or
+``WAYLAND_DISPLAY`` on Linux) or in batch mode (``MBRE_BATCH=1``, set by
+``mbre_plots.py``), the non-interactive Agg backend is selected up front, so pyplot
+neither probes the GUI toolkits on import nor opens a window. A backend chosen
+explicitly with ``MPLBACKEND`` is left alone. ``show()`` replaces ``plt.show()`` and
+does nothing in batch mode.
+"""
+import os
+import sys
+
+
+def has_display():
+    """Whether a GUI window can be opened"""
+    if sys.platform in ('win32', 'darwin'):
+        return True
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+def is_batch():
+    """Whether figures are only saved, never shown"""
+    return os.environ.get('MBRE_BATCH', '') not in ('', '0') or not has_display()
+
+
+def select_backend():
+    """Use Agg in batch mode unless a backend was chosen explicitly"""
+    if not is_batch() or os.environ.get('MPLBACKEND'):
+        return
+    if 'matplotlib' in sys.modules:
+        import matplotlib
+        matplotlib.use('Agg')
+    else:
+        os.environ['MPLBACKEND'] = 'Agg'
+
+
+def show():
+    """Display the open figures, except in batch mode"""
+    if is_batch():
+        return
+    import matplotlib.pyplot as plt
+    if plt.get_backend().lower() != 'agg':  # Agg cannot show anything
+        plt.show()
+
+
+select_backend()
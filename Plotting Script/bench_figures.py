@@ -0,0 +1,355 @@
+"""
+Benchmark of the figure builders on synthetic workbooks.
+
+A synthetic master workbook is generated for every requested size, with the same
+sheets and columns as ``Paper Screening and Data Extraction.xlsx`` and each sheet
+holding that many rows. Category counts grow with the size (more topics, domains,
+technologies and institutions for a larger corpus) with skewed frequencies, as in a
+real review. Generated workbooks are kept in ``.cache/bench/`` and reused.
+
+Each figure is timed in three separate stages:
+
+- load: parse the sheets the figure needs from the .xlsx (``workbook.read_sheets``,
+  without the on-disk sheet cache unless ``--cached`` is given)
+- aggregate: derive the figure's table from the parsed sheets (``workbook.TABLES``)
+- render: run the figure script with its table served from memory, which includes
+  any reshaping the script does itself and saving the image
+
+Results are written to a JSON file, and ``--compare`` prints the ratio of every
+timing to an earlier result file, so regressions show up between versions.
+
+Usage:
+    python bench_figures.py                          # all figures, 10^2 to 10^5 rows
+    python bench_figures.py -s 100 1000000 -n 1      # selected sizes, one run each
+    python bench_figures.py "Topic Trends" -o new.json --compare old.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import backend
+import sheet_cache
+import workbook
+from mbre_plots import BASE_DIR, build_figure, discover_figures
+
+BENCH_DIR = os.path.join(BASE_DIR, '.cache', 'bench')
+GENERATOR_VERSION = 1  # Bump when the synthetic data changes, so old workbooks are regenerated
+SIZES = [100, 1000, 10000, 100000]  # 10^6 rows is supported but takes minutes per figure
+MAX_ROWS = 1048576  # Rows per Excel worksheet
+STAGES = ['load', 'aggregate', 'render']
+
+# Figure script -> workbook table it draws
+FIGURE_TABLES = {
+    'Publication Year': 'Publication Year',
+    'Publication Type': 'Publication Type',
+    'Publisher': 'Publisher',
+    'Score Distribution': 'Score Distribution',
+    'Score Details': 'Score Details',
+    'Technology Evaluation': 'Technology Score',
+    'Domain-Type (Heatmap)': 'Domain-Type Counts',
+    'Topic Trends': 'Topic Trends',
+    'Region_new': 'Region_new',
+}
+
+# Fixed vocabularies of the synthetic papers
+YEARS = np.arange(2010, 2025)
+PAPER_CLASSES = ['A', 'B', 'C', 'D']
+PUBLISHERS = ['IEEE', 'Springer', 'Elsevier', 'IEEE/ACM', 'MDPI', 'Wiley', 'ACM']
+PAPER_TYPES = ['Requirements Modeling Approach', 'Requirements Traceability and Management',
+               'Requirements Analysis', 'Evaluation and Validation',
+               'Requirements Modeling Approach (Language)', 'Requirements Modeling Approach (Tools)',
+               'Requirements Verification and Validation',
+               'Requirements Engineering and Full Lifecycle Integration']
+AUTHOR_POSITIONS = ['first', 'middle', 'last']
+
+
+def _skewed(rng, n_categories, size, exponent=1.0):
+    """Category indices with Zipf-like frequencies (index 0 most frequent)"""
+    weights = 1 / np.arange(1, n_categories + 1) ** exponent
+    return rng.choice(n_categories, size=size, p=weights / weights.sum())
+
+
+def _labels(prefix, indices):
+    return [f'{prefix} {i + 1}' for i in indices.tolist()]
+
+
+def synthetic_sheets(n_rows, seed=0):
+    """Raw rows of every benchmarked sheet, each with a header and ``n_rows`` data rows"""
+    rng = np.random.default_rng(seed)
+    ids = [f'S{i + 1:07d}' for i in range(n_rows)]
+    # Later years hold more papers, as in the real corpus
+    year_weights = np.linspace(1, 4, len(YEARS))
+    years = rng.choice(YEARS, size=n_rows, p=year_weights / year_weights.sum()).tolist()
+    n_topics = max(5, int(np.sqrt(n_rows)))
+    n_domains = max(5, int(2 * np.sqrt(n_rows)))
+    n_technologies = max(5, int(np.sqrt(n_rows)))
+    types = [PAPER_TYPES[i] for i in _skewed(rng, len(PAPER_TYPES), n_rows).tolist()]
+    technologies = _labels('Technology', _skewed(rng, n_technologies, n_rows))
+    sheets = {}
+
+    item_types = list(workbook.ITEM_TYPE_LABELS)
+    sheets[workbook.SELECTED_SHEET] = [
+        ['Id', 'No', 'Type-0', 'Item Type', 'Publication Year', 'Citation', 'Region', 'Title',
+         'Abstract Note', 'Publisher', 'Publication Title', 'Author', 'Type', 'Technology',
+         'Topic', 'Domain', 'Key Contribution', 'Abstract'],
+        *([paper_id, i + 1, paper_class, item_type, year, citations, 'Region', f'Title {i + 1}',
+           'Abstract', publisher, 'Venue', 'A. Author; B. Author', paper_type, technology,
+           'Topic', 'Domain', 'Contribution', 'Abstract']
+          for i, (paper_id, paper_class, item_type, year, citations, publisher, paper_type, technology)
+          in enumerate(zip(ids, rng.choice(PAPER_CLASSES, n_rows).tolist(),
+                           [item_types[i] for i in _skewed(rng, len(item_types), n_rows).tolist()],
+                           years, rng.geometric(0.02, n_rows).tolist(),
+                           [PUBLISHERS[i] for i in _skewed(rng, len(PUBLISHERS), n_rows, 0.6).tolist()],
+                           types, technologies))),
+    ]
+
+    domains = _labels('domain', _skewed(rng, n_domains, n_rows, 0.8))
+    sheets[workbook.DOMAIN_TYPE_SHEET] = [['Id', 'Type', 'Domain'], *map(list, zip(ids, types, domains))]
+
+    topics = _labels('topic', _skewed(rng, n_topics, n_rows, 0.8))
+    sheets[workbook.TOPIC_TRENDS_SHEET] = [
+        ['Id', 'Publication Year', 'Topic(original)', 'Topic'],
+        *([paper_id, year, topic, topic] for paper_id, year, topic in zip(ids, years, topics)),
+    ]
+
+    # Per-paper technology column, and the score table of every technology beside it
+    scores = rng.integers(1, 5, size=(n_technologies, len(workbook.TECHNOLOGY_COLUMNS) - 1)).tolist()
+    technology_rows = [[paper_id, paper_type, technology]
+                       for paper_id, paper_type, technology in zip(ids, types, technologies)]
+    technology_rows[0] += [None, *workbook.TECHNOLOGY_COLUMNS]
+    for i, row in enumerate(scores[:n_rows - 1]):
+        technology_rows[i + 1] += [None, f'Technology {i + 1}', *row]
+    sheets[workbook.TECHNOLOGY_SHEET] = [['Id', 'Type', 'Technology'], *technology_rows]
+
+    criteria = list(workbook.QUALITY_CRITERIA.values())
+    answers = rng.choice([0, 0.5, 1], size=(n_rows, len(criteria)), p=[0.15, 0.25, 0.6])
+    evaluation_header = ['Id', 'Publication Year', 'Title', 'Citation', 'Technology', 'Context',
+                         'Objective', 'Procedure', 'Validation', 'Val-Operation', 'Limitation',
+                         'Future Work', 'Abstract', 'Score']
+    qc_columns = [evaluation_header.index(col) for col in criteria]
+    evaluation_rows = []
+    for i, (paper_id, year, technology, row) in enumerate(zip(ids, years, technologies, answers.tolist())):
+        values = [paper_id, year, f'Title {i + 1}', 0, technology, None, None, None, None,
+                  'case study', None, None, 'Abstract', sum(row)]
+        for column, answer in zip(qc_columns, row):
+            values[column] = answer
+        evaluation_rows.append(values)
+    sheets[workbook.EVALUATION_SHEET] = [evaluation_header, *evaluation_rows]
+
+    # Author rows: papers with 1-7 authors, some authors in two countries
+    author_counts = rng.integers(1, 8, size=n_rows)
+    author_counts = author_counts[:np.searchsorted(np.cumsum(author_counts), n_rows) + 1]
+    author_counts[-1] -= author_counts.sum() - n_rows
+    papers = np.repeat(np.arange(len(author_counts)), author_counts)
+    countries = list(workbook.COUNTRY_NAMES)
+    country = np.array(countries)[_skewed(rng, len(countries), n_rows)]
+    second_country = np.array(countries)[_skewed(rng, len(countries), n_rows)]
+    dual = rng.random(n_rows) < 0.1
+    institutions = _labels('University', _skewed(rng, max(5, n_rows // 5), n_rows, 0.7))
+    sheets[workbook.AUTHOR_DATA_SHEET] = [
+        ['Original_DOI', 'Paper_Title', 'Year', 'Author_Name', 'Author_Position', 'All_Institutions',
+         'Institutions', 'All_Countries', 'Author_Count', 'Score'],
+        *([f'10.0000/bench.{paper}', f'Title {paper + 1}', int(YEARS[paper % len(YEARS)]),
+           f'Author {i + 1}', AUTHOR_POSITIONS[i % 3], institution, institution,
+           f'{first}; {second}' if two else first, int(author_counts[paper]), 1 / int(author_counts[paper])]
+          for i, (paper, institution, first, second, two)
+          in enumerate(zip(papers.tolist(), institutions, country.tolist(), second_country.tolist(),
+                           dual.tolist()))),
+    ]
+    return sheets
+
+
+def synthetic_workbook(n_rows, seed=0):
+    """Path of a synthetic master workbook with ``n_rows`` rows per sheet, generated once"""
+    if not 1 <= n_rows < MAX_ROWS:
+        raise ValueError(f'Rows per sheet must be between 1 and {MAX_ROWS - 1}, got {n_rows}')
+    path = os.path.join(BENCH_DIR, f'synthetic_v{GENERATOR_VERSION}_{n_rows}_{seed}.xlsx')
+    if os.path.exists(path):
+        return path
+
+    from openpyxl import Workbook
+
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    wb = Workbook(write_only=True)  # Streams the rows to disk instead of building the cell model
+    for name, rows in synthetic_sheets(n_rows, seed).items():
+        ws = wb.create_sheet(name)
+        for row in rows:
+            ws.append(row)
+    tmp_path = path + '.tmp'
+    wb.save(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def bench_figure(name, path, workbook_path, runs=1):
+    """Best-of-``runs`` load, aggregate and render seconds of one figure"""
+    table_name = FIGURE_TABLES[name]
+    sheet_names, builder = workbook.table_sheets(table_name), workbook.TABLES[table_name][1]
+    timings = {stage: float('inf') for stage in STAGES}
+    result = {'figure': name, 'table': table_name, 'status': 'ok', 'error': None}
+    load_tables = workbook.load_tables
+    try:
+        for _ in range(runs):
+            workbook.clear_cache()
+            seconds, sheets = _timed(workbook.read_sheets, sheet_names, workbook_path)
+            timings['load'] = min(timings['load'], seconds)
+            seconds, table = _timed(builder, sheets)
+            timings['aggregate'] = min(timings['aggregate'], seconds)
+
+            # The script gets a fresh copy of the table instead of reading the workbook
+            served = {table_name: table.copy()}
+            workbook.load_tables = lambda names=None, workbook_path=None: {n: served[n] for n in names}
+            with tempfile.TemporaryDirectory() as out_dir:  # Keep the images out of the repo
+                cwd = os.getcwd()
+                os.chdir(out_dir)
+                try:
+                    build = build_figure(name, path)
+                finally:
+                    os.chdir(cwd)
+            workbook.load_tables = load_tables
+            if build['status'] != 'ok':
+                raise RuntimeError(build['error'])
+            timings['render'] = min(timings['render'], build['seconds'])
+    except Exception as e:
+        result.update(status='failed', error=str(e).strip().splitlines()[-1])
+    finally:
+        workbook.load_tables = load_tables
+        workbook.clear_cache()
+    result.update({stage: (seconds if seconds != float('inf') else None) for stage, seconds in timings.items()})
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Versions and machine details stored with the results"""
+    import matplotlib
+    import pandas as pd
+
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+def benchmark(figures, sizes=SIZES, runs=1, seed=0, cached=False, progress=None):
+    """Timings of every figure at every size, as a list of dicts"""
+    cache_dir = sheet_cache.CACHE_DIR
+    if cached:
+        sheet_cache.CACHE_DIR = os.path.join(BENCH_DIR, 'sheets')
+    else:
+        sheet_cache.CACHE_DIR = ''  # Time the .xlsx parse itself
+    import matplotlib.pyplot  # noqa: F401  Imported up front, not inside the first timing
+    import pandas  # noqa: F401
+
+    results = []
+    try:
+        for n_rows in sizes:
+            seconds, workbook_path = _timed(synthetic_workbook, n_rows, seed)
+            if progress:
+                progress(f'{n_rows} rows: workbook ready in {seconds:.1f} s')
+            if cached:
+                workbook.load_tables(sorted({FIGURE_TABLES[name] for name in figures}), workbook_path)
+            for name, path in figures.items():
+                result = {'rows': n_rows, **bench_figure(name, path, workbook_path, runs)}
+                results.append(result)
+                if progress:
+                    progress(format_result(result))
+    finally:
+        sheet_cache.CACHE_DIR = cache_dir
+    return results
+
+
+def format_result(result, width=24):
+    """One line of a benchmark result"""
+    if result['status'] != 'ok':
+        return f"{result['figure']:<{width}} {result['rows']:>8}  failed: {result['error']}"
+    stages = '  '.join(f'{stage} {result[stage]:7.3f} s' for stage in STAGES)
+    return f"{result['figure']:<{width}} {result['rows']:>8}  {stages}"
+
+
+def compare(old_results, new_results):
+    """Ratio new/old of every stage timing present in both result lists"""
+    old = {(r['figure'], r['rows']): r for r in old_results}
+    ratios = []
+    for result in new_results:
+        previous = old.get((result['figure'], result['rows']))
+        if previous is None:
+            continue
+        for stage in STAGES:
+            if result.get(stage) and previous.get(stage):
+                ratios.append((result['figure'], result['rows'], stage, result[stage] / previous[stage]))
+    return ratios
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark the figure builders on synthetic workbooks.')
+    parser.add_argument('figures', nargs='*', help='Figure script names (default: all benchmarked figures)')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=SIZES, help='Rows per sheet')
+    parser.add_argument('-n', '--runs', type=int, default=1, help='Runs per measurement, best is kept')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data')
+    parser.add_argument('--cached', action='store_true', help='Load sheets from the on-disk sheet cache')
+    parser.add_argument('-o', '--output', default=os.path.join(BENCH_DIR, 'bench_figures.json'),
+                        help='JSON result file (default: .cache/bench/bench_figures.json)')
+    parser.add_argument('--compare', metavar='JSON', help='Earlier result file to compare against')
+    args = parser.parse_args(argv)
+
+    available = {name: path for name, path in discover_figures().items() if name in FIGURE_TABLES}
+    unknown = [name for name in args.figures if name not in available]
+    if unknown:
+        parser.error(f"Unknown figure(s): {', '.join(unknown)}")
+    figures = {name: available[name] for name in args.figures} if args.figures else available
+    if any(not 1 <= n < MAX_ROWS for n in args.sizes):
+        parser.error(f'Sizes must be between 1 and {MAX_ROWS - 1} rows')
+
+    os.environ['MBRE_BATCH'] = '1'  # Render without opening windows
+    backend.select_backend()
+    results = benchmark(figures, args.sizes, args.runs, args.seed, args.cached, progress=print)
+    report = {'environment': environment(), 'runs': args.runs, 'seed': args.seed,
+              'cached': args.cached, 'results': results}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f'Results written to {args.output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        print(f"Compared with {args.compare} (commit {previous['environment'].get('commit')}), new/old:")
+        for figure, rows, stage, ratio in compare(previous['results'], results):
+            flag = '  slower' if ratio > 1.2 else ''
+            print(f'{figure:<24} {rows:>8}  {stage:<9} {ratio:5.2f}x{flag}')
+
+    failed = [r for r in results if r['status'] != 'ok']
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
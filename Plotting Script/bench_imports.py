@@ -0,0 +1,95 @@
+"""
+Import-time benchmark of the figure scripts.
+
+For every figure script, the module-level imports are run in a fresh interpreter
+(the cold start of a figure before it does any work), optionally followed by the
+whole script. Each measurement is the best of several runs minus the start-up time
+of a bare interpreter. ``python -X importtime`` names the slowest top-level imports.
+
+Usage:
+    python bench_imports.py                 # import time of every figure script
+    python bench_imports.py --full -n 3     # also time complete runs, best of 3
+    python bench_imports.py "Publisher"     # selected figures only
+"""
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+import time
+
+from mbre_plots import BASE_DIR, discover_figures
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| (\S.*)$')
+
+
+def import_code(script_path):
+    """Source of the module-level import statements of a script"""
+    with open(script_path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), script_path)
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return '\n'.join(ast.unparse(node) for node in imports)
+
+
+def _run(args, env):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=BASE_DIR, env=env,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'failed')
+    return elapsed, result.stderr
+
+
+def slowest_imports(stderr, top=3):
+    """The top-level modules with the largest cumulative import time (seconds)"""
+    modules = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match and not match.group(2).startswith(' '):
+            modules.append((int(match.group(1)) / 1e6, match.group(2)))
+    return sorted(modules, reverse=True)[:top]
+
+
+def benchmark(figures, runs=3, full=False):
+    """Cold-start timings of each figure as a list of dicts"""
+    env = dict(os.environ, MBRE_BATCH='1')
+    baseline = min(_run(['-c', 'pass'], env)[0] for _ in range(runs))
+    results = []
+    for name, path in figures.items():
+        code = import_code(path)
+        imports = min(_run(['-c', code], env)[0] for _ in range(runs)) - baseline
+        _, stderr = _run(['-X', 'importtime', '-c', code], env)
+        result = {'figure': name, 'imports': imports, 'slowest': slowest_imports(stderr)}
+        if full:
+            result['total'] = min(_run([path], env)[0] for _ in range(runs)) - baseline
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Import-time benchmark of the figure scripts.')
+    parser.add_argument('figures', nargs='*', help='Figure script names (default: all)')
+    parser.add_argument('-n', '--runs', type=int, default=3, help='Runs per measurement, best is kept')
+    parser.add_argument('--full', action='store_true', help='Also time complete script runs')
+    args = parser.parse_args(argv)
+
+    figures = discover_figures()
+    unknown = [name for name in args.figures if name not in figures]
+    if unknown:
+        parser.error(f"Unknown figure(s): {', '.join(unknown)}")
+    if args.figures:
+        figures = {name: figures[name] for name in args.figures}
+
+    width = max(len(name) for name in figures)
+    print(f"{'figure':<{width}}  imports" + ('    total' if args.full else '') + '  slowest imports')
+    for result in benchmark(figures, args.runs, args.full):
+        total = f"  {result['total']:6.2f} s" if args.full else ''
+        slowest = ', '.join(f'{module} {seconds:.2f}' for seconds, module in result['slowest'])
+        print(f"{result['figure']:<{width}}  {result['imports']:5.2f} s{total}  {slowest}")
+
+
+if __name__ == '__main__':
+    main()
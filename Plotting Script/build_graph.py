@@ -0,0 +1,124 @@
+"""
+Dependency tracking for incremental figure builds.
+
+After a figure is built, its entry in the build state records:
+- the workbook sheets and other data files (e.g. ``abstract.txt``) it read
+  (reported by ``workbook.py``),
+- the files it wrote (captured from ``savefig``),
+- an input hash over the script source, the source of every helper module the
+  script imports (directly or through other helpers), the content keys of the
+  sheets and the contents of the data files it read, the matplotlib version and
+  ``matplotlibrc`` it was styled with, and the extra exports requested with
+  ``MBRE_EXPORTS`` (see ``export.py``).
+
+A figure is stale when it has no entry, one of its outputs is missing, or its input
+hash changed. Editing one sheet therefore only rebuilds the figures that read it.
+"""
+import hashlib
+import json
+import os
+import re
+
+import sheet_cache
+import workbook
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.path.join(BASE_DIR, '.cache', 'build_state.json')
+
+_IMPORT_RE = re.compile(r'^\s*(?:from|import)\s+(\w+)', re.MULTILINE)
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def helper_modules(script_path, base_dir=BASE_DIR):
+    """Paths of the local helper modules a script imports, followed transitively"""
+    found = []
+    pending = [script_path]
+    while pending:
+        with open(pending.pop(), encoding='utf-8') as f:
+            source = f.read()
+        for module in _IMPORT_RE.findall(source):
+            path = os.path.join(base_dir, f'{module}.py')
+            if os.path.exists(path) and path not in found:
+                found.append(path)
+                pending.append(path)
+    return sorted(found)
+
+
+def _style_signature():
+    import matplotlib
+    rc_file = matplotlib.matplotlib_fname()
+    rc_hash = _file_hash(rc_file) if os.path.exists(rc_file) else '-'
+    return f'matplotlib {matplotlib.__version__} {rc_hash}'
+
+
+def input_hash(script_path, sheets, sheet_keys=None, style=None, files=()):
+    """Hash of everything a figure's pixels depend on"""
+    if sheet_keys is None:
+        sheet_keys = sheet_cache.sheet_keys(workbook.MASTER_WORKBOOK)
+    digest = hashlib.sha256()
+    digest.update(_file_hash(script_path).encode())
+    for path in helper_modules(script_path):
+        digest.update(f'{os.path.basename(path)}:{_file_hash(path)}'.encode())
+    for sheet in sorted(sheets):
+        digest.update(f'{sheet}:{sheet_keys.get(sheet, "missing")}'.encode())
+    for path in sorted(files):
+        full_path = os.path.join(BASE_DIR, path)
+        file_hash = _file_hash(full_path) if os.path.exists(full_path) else 'missing'
+        digest.update(f'{path}:{file_hash}'.encode())
+    digest.update((style or _style_signature()).encode())
+    digest.update(f"exports:{os.environ.get('MBRE_EXPORTS', '')}".encode())
+    return digest.hexdigest()
+
+
+def load_state(path=STATE_PATH):
+    """Read the build state, or an empty one"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_PATH):
+    """Write the build state atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def stale_figures(figures, state, base_dir=BASE_DIR):
+    """Return the subset of {name: script path} that needs rebuilding"""
+    sheet_keys = sheet_cache.sheet_keys(workbook.MASTER_WORKBOOK)
+    style = _style_signature()
+    stale = {}
+    for name, path in figures.items():
+        entry = state.get(name)
+        if (entry is None
+                or not entry['outputs']
+                or not all(os.path.exists(os.path.join(base_dir, out)) for out in entry['outputs'])
+                or entry['input_hash'] != input_hash(path, entry['sheets'], sheet_keys, style,
+                                                     entry.get('files', []))):
+            stale[name] = path
+    return stale
+
+
+def record(state, name, script_path, sheets, outputs, sheet_keys=None, files=(), base_dir=BASE_DIR):
+    """Store the dependencies of a successful build
+
+    ``sheet_keys`` should be taken before the build started, so that a sheet edited
+    while the figure was rendering still marks it stale next time.
+    """
+    files = sorted(os.path.relpath(path, base_dir) for path in files)
+    state[name] = {
+        'script': os.path.relpath(script_path, base_dir),
+        'sheets': sorted(sheets),
+        'files': files,
+        'outputs': sorted(os.path.relpath(out, base_dir) for out in outputs),
+        'input_hash': input_hash(script_path, sheets, sheet_keys, files=files),
+    }
@@ -0,0 +1,264 @@
+"""
+Declarative specs of the simple charts and one generic renderer for them.
+
+The bar, line, pie and stacked-bar figures used to be scripts that each repeated
+the same parameter block and plotting code at module level, so they could only be
+built by running the file. Each of them is now a ``ChartSpec`` in ``SPECS``: the
+workbook table and columns it shows, the chart kind and its style. ``render`` draws
+any spec as a matplotlib figure, and ``build`` renders and saves it. The figure
+scripts are thin wrappers around ``build``, while ``build_many`` renders several
+charts in one process from a single ``workbook.load_tables`` call, so a long-lived
+worker imports matplotlib and reads the shared sheets once for all of them.
+
+To change a chart, edit its spec below; a script may also override single fields,
+e.g. ``charts.build('Publisher', save_path='Publisher.pdf')``.
+
+Usage:
+    python charts.py                        # build every chart in this process
+    python charts.py "Publisher" "Score Details"
+"""
+import argparse
+import os
+import time
+from typing import NamedTuple, Optional
+
+import profiling
+import style
+import workbook
+
+
+class ChartSpec(NamedTuple):
+    """Data source, kind and style of one chart"""
+    table: str  # Table in workbook.TABLES
+    kind: str  # 'bar', 'line', 'pie' or 'stacked-bar' (horizontal)
+    category: str  # Category column
+    values: tuple  # Value column(s); a stacked bar stacks them left to right
+    save_path: str
+    figsize: tuple = (8, 5)
+    colors: tuple = (style.PRIMARY,)  # One color per value column, or per slice of a pie
+    width: float = 0.5  # Bar width (height of horizontal bars)
+    grid_linewidth: Optional[float] = 0.5  # None: no grid
+    xlabel: Optional[str] = None
+    ylabel: Optional[str] = None
+    ylim: Optional[tuple] = None  # Value axis range
+    headroom: Optional[float] = None  # Value axis ends this far above the largest value
+    xtick_step: Optional[float] = None  # Numeric category ticks every step, with one step of margin
+    xtick_rotation: Optional[float] = None
+    integer_ticks: bool = False  # Integer ticks on the value axis
+    tick_style: Optional[dict] = None  # Extra ``tick_params`` of the category axis
+    bold_ticks: bool = False  # Bold category tick labels
+    hide_value_axis: bool = False  # No value axis ticks and labels
+    spines: tuple = ('bottom', 'left')  # Visible spines
+    label_size: Optional[int] = 12  # Font size of the value labels (None: no labels)
+    label_offset: float = 0.3  # Distance of line chart value labels above the points
+    font_size: int = 14  # Base font size of pie labels and legend
+    dpi: int = 300
+    bbox_inches: Optional[str] = None
+
+
+SPECS = {
+    'Publication Year': ChartSpec(
+        table='Publication Year', kind='line', category='Publication Year',
+        values=('Number of papers',), save_path='Figure/fig2_Publication Year.png',
+        figsize=(13, 5), grid_linewidth=1, xlabel='Publication Year', ylabel='Number of papers',
+        headroom=3, xtick_rotation=40, integer_ticks=True,
+    ),
+    'Publication Type': ChartSpec(
+        table='Publication Type', kind='bar', category='Publication Type',
+        values=('Number of papers',), save_path='Figure/fig5_Publication Venue.png',
+        width=0.30, ylim=(0, 60), tick_style={'labelsize': 12, 'colors': style.TEXT_COLOR, 'pad': 6},
+        bold_ticks=True, hide_value_axis=True, spines=('bottom',), label_size=14,
+    ),
+    'Publisher': ChartSpec(
+        table='Publisher', kind='pie', category='Publisher',
+        values=('Number of papers',), save_path='Figure/fig4_Publisher.png',
+        colors=style.SLICE_COLORS, grid_linewidth=None,
+        bbox_inches='tight',
+    ),
+    'Score Distribution': ChartSpec(
+        table='Score Distribution', kind='bar', category='Score',
+        values=('Number of papers',), save_path='Figure/fig11_Quality score distribution.png',
+        figsize=(8, 6), width=0.25, xlabel='Quality score', ylabel='Number of papers',
+        ylim=(0, 50), xtick_step=0.5,
+    ),
+    'Score Details': ChartSpec(
+        table='Score Details', kind='stacked-bar', category='Dimension',
+        values=('Not', 'To some extend', 'Yes'), save_path='Figure/fig12_Quality score details.png',
+        figsize=(10, 6), colors=style.LEVEL_COLORS, integer_ticks=True,
+    ),
+}
+
+
+def _line(ax, spec, table):
+    categories = table[spec.category]
+    values = table[spec.values[0]]
+    ax.plot(categories, values, marker='o', color=spec.colors[0], linestyle='-', linewidth=3)
+    ax.set_xticks(categories)  # One tick per category (e.g. every year)
+    if spec.label_size:
+        for category, value in zip(categories, values):
+            ax.text(category, value + spec.label_offset, str(value), ha='center', fontsize=spec.label_size)
+    return values
+
+
+def _bar(ax, spec, table):
+    import numpy as np
+
+    categories = table[spec.category]
+    values = table[spec.values[0]]
+    bars = ax.bar(categories, values, color=spec.colors[0], width=spec.width)
+    if spec.xtick_step:
+        step = spec.xtick_step
+        ax.set_xticks(np.arange(np.min(categories) - step, np.max(categories) + step, step))
+    if spec.label_size:
+        ax.bar_label(bars, fontsize=spec.label_size, padding=3, color='black')
+    return values
+
+
+def _stacked_bar(ax, spec, table):
+    categories = table[spec.category]
+    left = None
+    for column, color in zip(spec.values, spec.colors):
+        ax.barh(categories, table[column], left=left, label=column, color=color, height=spec.width)
+        left = table[column] if left is None else left + table[column]
+    ax.set_ylim(-0.5, len(categories) - 0.5)
+    if spec.label_size:
+        # Non-zero values in the middle of their segment
+        for i, row in enumerate(zip(*(table[column] for column in spec.values))):
+            start = 0
+            for value in row:
+                if value > 0:
+                    ax.text(start + value / 2, i, str(value), ha='center', va='center',
+                            fontsize=spec.label_size, color='white')
+                start = start + value
+    ax.legend(ncol=len(spec.values), loc='upper center', bbox_to_anchor=(0.47, -0.05), frameon=False)
+    return left
+
+
+def _pie(ax, spec, table):
+    import matplotlib.pyplot as plt
+
+    categories = table[spec.category]
+    values = table[spec.values[0]]
+    total = sum(values)
+
+    def autopct(pct):
+        return f'{int(round(pct * total / 100))}\n({pct:.1f}%)'
+
+    wedges, _, autotexts = ax.pie(
+        values, labels=categories, colors=spec.colors, startangle=90, autopct=autopct,
+        pctdistance=0.75, wedgeprops={'edgecolor': 'white', 'linewidth': 0.8},
+        textprops={'fontsize': spec.font_size - 1, 'fontweight': 'semibold', 'color': style.TEXT_COLOR},
+    )
+    plt.setp(autotexts, fontsize=spec.font_size - 1, color='white', fontweight='bold')
+    ax.legend(wedges, categories, loc='center left', bbox_to_anchor=(1, 0.5), frameon=False,
+              fontsize=spec.font_size - 2, title_fontsize=spec.font_size, labelspacing=1.2)
+    ax.axis('equal')
+    return values
+
+
+RENDERERS = {
+    'line': _line,
+    'bar': _bar,
+    'stacked-bar': _stacked_bar,
+    'pie': _pie,
+}
+
+
+@profiling.profiled('render')
+def render(spec, table):
+    """Draw a chart spec from its table and return the figure"""
+    import matplotlib.pyplot as plt
+    import matplotlib.ticker as ticker
+
+    if spec.kind not in RENDERERS:
+        raise ValueError(f"Unknown chart kind '{spec.kind}', expected one of {', '.join(RENDERERS)}")
+    style.apply()
+    fig, ax = plt.subplots(figsize=spec.figsize)
+    values = RENDERERS[spec.kind](ax, spec, table)
+    if spec.kind == 'pie':
+        fig.tight_layout()
+        return fig
+
+    horizontal = spec.kind == 'stacked-bar'
+    value_axis = ax.xaxis if horizontal else ax.yaxis
+    if spec.grid_linewidth is not None:
+        ax.set_facecolor('white')
+        ax.grid(True, which='both', axis='both', linestyle=style.GRID_LINESTYLE,
+                linewidth=spec.grid_linewidth, color=style.GRID_COLOR)
+    if spec.ylim is not None:
+        ax.set_ylim(*spec.ylim)
+    elif spec.headroom is not None:
+        ax.set_ylim(0, max(values) + spec.headroom)
+    if spec.integer_ticks:
+        value_axis.set_major_locator(ticker.MaxNLocator(integer=True))
+    if spec.tick_style:
+        ax.tick_params(axis='x', which='major', **spec.tick_style)
+    if spec.bold_ticks:
+        for label in ax.get_xticklabels():
+            label.set_fontweight('bold')
+    if spec.hide_value_axis:
+        ax.tick_params(left=False, labelleft=False)
+    if spec.xlabel:
+        ax.set_xlabel(spec.xlabel, fontsize=12)
+    if spec.ylabel:
+        ax.set_ylabel(spec.ylabel, fontsize=12)
+    for side, spine in ax.spines.items():
+        spine.set_visible(side in spec.spines)
+    if spec.xtick_rotation is not None:
+        plt.setp(ax.get_xticklabels(), rotation=spec.xtick_rotation, ha='right')
+    fig.tight_layout()
+    return fig
+
+
+def build(name, table=None, **overrides):
+    """Render a registered chart, save it and return the figure
+
+    The table is loaded from the master workbook unless it is given; keyword
+    arguments override fields of the spec.
+    """
+    import export
+
+    spec = SPECS[name]._replace(**overrides)
+    if table is None:
+        table = workbook.load_table(spec.table)
+    fig = render(spec, table)
+    export.save_figure(fig, spec.save_path, dpi=spec.dpi, figure=name,
+                       **({'bbox_inches': spec.bbox_inches} if spec.bbox_inches else {}))
+    return fig
+
+
+def build_many(names=None):
+    """Build several charts (default: all) from one load of their tables
+
+    Returns {chart name: seconds spent rendering and saving it}.
+    """
+    import matplotlib.pyplot as plt
+
+    names = list(SPECS) if names is None else list(names)
+    tables = workbook.load_tables(sorted({SPECS[name].table for name in names}))
+    timings = {}
+    for name in names:
+        start = time.perf_counter()
+        plt.close(build(name, tables[SPECS[name].table]))
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Build the spec-based charts in one process.')
+    parser.add_argument('charts', nargs='*', help='Chart names (default: all)')
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.charts if name not in SPECS]
+    if unknown:
+        parser.error(f"Unknown chart(s): {', '.join(unknown)}")
+    os.environ['MBRE_BATCH'] = '1'  # Charts are only saved, never shown
+    import backend  # noqa: F401  Selects Agg before pyplot is imported
+
+    for name, seconds in build_many(args.charts or None).items():
+        print(f'{name:<20}  {seconds:6.2f} s  {SPECS[name].save_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+Co-authorship graph of the selected papers.
+
+Authors are mapped to integer ids while the author sheet is streamed once, which
+yields the paper x author incidence matrix. The co-authorship adjacency is its
+sparse product with itself (edge weight = number of joint papers), so the graph
+costs memory proportional to the number of author pairs, never authors squared.
+Degrees and connected components are computed on the sparse matrix in a few
+vectorised calls.
+
+The layout places every connected component on its own: small components with a
+force-directed (Fruchterman-Reingold) layout, large ones with a spectral layout,
+and the components are then packed on a spiral, largest in the middle. The cost
+grows with the size of the largest force-directed component, not with the total
+number of authors, and ``top_components`` keeps only the k largest components
+for very large corpora.
+
+SciPy is required.
+
+Usage:
+    python coauthors.py                     # statistics of the "authors" sheet
+    python coauthors.py "All Author Data"   # statistics of the author data sheet
+"""
+import argparse
+from array import array
+from typing import NamedTuple
+
+import numpy as np
+
+import profiling
+import screening
+import workbook
+
+AUTHORS_SHEET = 'authors'
+AUTHOR_DATA_SHEET = workbook.AUTHOR_DATA_SHEET
+# Sheet -> (paper key column, author column); "authors" lists all authors of a paper
+# in one cell separated by ";", "All Author Data" has one row per paper and author
+AUTHOR_COLUMNS = {
+    AUTHORS_SHEET: ('Id', 'Author'),
+    AUTHOR_DATA_SHEET: ('Original_DOI', 'Author_Name'),
+}
+FORCE_MAX_NODES = 500  # Larger components get a spectral layout
+FORCE_ITERATIONS = 100
+
+
+class CoauthorGraph(NamedTuple):
+    """Authors and their co-authorship adjacency"""
+    names: np.ndarray  # Author name of each id
+    papers: np.ndarray  # Number of papers of each author
+    adjacency: object  # CSR matrix, weight = number of joint papers
+
+
+def iter_authorships(sheet=AUTHORS_SHEET, workbook_path=workbook.MASTER_WORKBOOK):
+    """Yield (paper key, author name) pairs of an author sheet"""
+    paper_column, author_column = AUTHOR_COLUMNS[sheet]
+    for paper, authors in screening.iter_columns(sheet, [paper_column, author_column], workbook_path):
+        if paper is None or authors is None:
+            continue
+        for author in str(authors).split(';'):
+            author = author.strip()
+            if author:
+                yield paper, author
+
+
+def build_graph(authorships):
+    """Build the co-authorship graph from (paper key, author name) pairs in one pass"""
+    from scipy import sparse
+
+    author_ids = {}
+    paper_ids = {}
+    rows = array('q')
+    cols = array('q')
+    for paper, author in authorships:
+        rows.append(paper_ids.setdefault(paper, len(paper_ids)))
+        cols.append(author_ids.setdefault(author, len(author_ids)))
+
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (np.frombuffer(rows, dtype=np.int64),
+                                              np.frombuffer(cols, dtype=np.int64))),
+        shape=(len(paper_ids), len(author_ids)),
+    )
+    incidence.data[:] = 1  # An author listed twice on a paper still counts once
+
+    adjacency = (incidence.T @ incidence).tocsr()
+    adjacency.setdiag(0)
+    adjacency.eliminate_zeros()
+    return CoauthorGraph(
+        names=np.array(list(author_ids), dtype=object),
+        papers=np.asarray(incidence.sum(axis=0)).ravel(),
+        adjacency=adjacency,
+    )
+
+
+@profiling.profiled('load')
+def load_graph(sheet=AUTHORS_SHEET, workbook_path=workbook.MASTER_WORKBOOK):
+    """Co-authorship graph of an author sheet"""
+    return build_graph(iter_authorships(sheet, workbook_path))
+
+
+def components(adjacency):
+    """Component label of every author, with components numbered largest first"""
+    from scipy.sparse import csgraph
+
+    _, labels = csgraph.connected_components(adjacency, directed=False)
+    sizes = np.bincount(labels)
+    rank = np.empty_like(sizes)
+    rank[np.argsort(-sizes, kind='stable')] = np.arange(len(sizes))
+    return rank[labels]
+
+
+def upper_edges(adjacency):
+    """Every co-author pair once, as a COO matrix (row < col, data = joint papers)"""
+    from scipy import sparse
+
+    return sparse.triu(adjacency, k=1, format='coo')
+
+
+def graph_stats(graph):
+    """Author, edge, degree and component statistics of a co-authorship graph"""
+    adjacency = graph.adjacency
+    degree = np.diff(adjacency.indptr)
+    labels = components(adjacency)
+    sizes = np.bincount(labels)
+    top = np.argsort(-degree, kind='stable')[:10]
+    return {
+        'authors': adjacency.shape[0],
+        'edges': adjacency.nnz // 2,
+        'mean_degree': float(degree.mean()) if len(degree) else 0.0,
+        'max_degree': int(degree.max()) if len(degree) else 0,
+        'isolated': int((degree == 0).sum()),
+        'components': len(sizes),
+        'largest_component': int(sizes.max()) if len(sizes) else 0,
+        'component_sizes': {int(size): int(count) for size, count in zip(*np.unique(sizes, return_counts=True))},
+        'top_authors': [(graph.names[i], int(degree[i]), int(graph.papers[i])) for i in top],
+    }
+
+
+def top_components(graph, k):
+    """Subgraph of the k largest components, and the ids of its authors in the full graph"""
+    keep = np.flatnonzero(components(graph.adjacency) < k)
+    subgraph = CoauthorGraph(
+        names=graph.names[keep],
+        papers=graph.papers[keep],
+        adjacency=graph.adjacency[keep][:, keep].tocsr(),
+    )
+    return subgraph, keep
+
+
+def _force_layout(adjacency, rng, iterations=FORCE_ITERATIONS):
+    """Fruchterman-Reingold layout of one (small) component, authors about one unit apart"""
+    n = adjacency.shape[0]
+    linked = (adjacency.toarray() > 0).astype(float)
+    pos = rng.uniform(-1, 1, size=(n, 2))
+    k = 1 / np.sqrt(n)
+    temperature = 0.1
+    for _ in range(iterations):
+        delta = pos[:, None, :] - pos[None, :, :]
+        distance = np.maximum(np.sqrt((delta ** 2).sum(axis=-1)), 0.01)
+        # Repulsion between all pairs, attraction along the edges
+        force = k * k / distance ** 2 - linked * distance / k
+        displacement = (delta * force[:, :, None]).sum(axis=1)
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1)), 0.01)
+        pos += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= 0.1 / (iterations + 1)
+    # Dense groups (many joint papers) contract, so scale by the typical gap to the
+    # nearest co-author rather than by k
+    distance = np.sqrt(((pos[:, None, :] - pos[None, :, :]) ** 2).sum(axis=-1))
+    np.fill_diagonal(distance, np.inf)
+    return (pos - pos.mean(axis=0)) / np.median(distance.min(axis=1))
+
+
+def _spectral_layout(adjacency):
+    """Layout of one (large) component from the normalised Laplacian eigenvectors"""
+    from scipy import sparse
+    from scipy.sparse.linalg import eigsh
+
+    degree = np.asarray(adjacency.sum(axis=1)).ravel().astype(float)
+    scale = sparse.diags(1 / np.sqrt(degree))
+    # Largest eigenvectors of D^-1/2 A D^-1/2 = smallest of the normalised Laplacian;
+    # eigsh returns them in ascending order, the last one is the trivial one
+    _, vectors = eigsh(scale @ adjacency.astype(float) @ scale, k=3, which='LA')
+    pos = vectors[:, :2] / np.sqrt(degree)[:, None]
+    pos -= pos.mean(axis=0)
+    # Spread over a disc with room for every author
+    return pos * np.sqrt(len(pos)) / np.sqrt((pos ** 2).sum(axis=1)).max()
+
+
+@profiling.profiled('transform')
+def layout(adjacency, method='auto', seed=0):
+    """2D positions of all authors, about one unit apart
+
+    Every component is laid out separately (``'force'``, ``'spectral'``, or ``'auto'``
+    for force-directed up to FORCE_MAX_NODES authors), and the components are packed
+    on a golden-angle spiral around the largest one.
+    """
+    if method not in ('auto', 'force', 'spectral'):
+        raise ValueError(f"Unknown layout method '{method}', expected 'auto', 'force' or 'spectral'")
+    rng = np.random.default_rng(seed)
+    labels = components(adjacency)
+    sizes = np.bincount(labels)
+    order = np.argsort(labels, kind='stable')  # Author ids grouped by component
+    starts = np.concatenate(([0], np.cumsum(sizes)))
+
+    pos = np.zeros((adjacency.shape[0], 2))
+    golden_angle = np.pi * (3 - np.sqrt(5))
+    packed_area = 0.0
+    for c, size in enumerate(sizes):
+        nodes = order[starts[c]:starts[c + 1]]
+        if size == 1:
+            local = np.zeros((1, 2))
+        elif size == 2:
+            local = np.array([[0.0, -0.5], [0.0, 0.5]])  # Stacked, so the names do not collide
+        else:
+            block = adjacency[nodes][:, nodes]
+            use_force = method == 'force' or (method == 'auto' and size <= FORCE_MAX_NODES)
+            local = _force_layout(block, rng) if use_force else _spectral_layout(block)
+        radius = np.sqrt((local ** 2).sum(axis=1)).max() + 0.5
+
+        # Components are numbered largest first: the largest sits in the middle and
+        # the others fill a spiral around it, outwards by size
+        if c == 0:
+            center = np.zeros(2)
+            inner_radius = radius
+        else:
+            packed_area += radius ** 2
+            distance = np.sqrt(inner_radius ** 2 + 2 * packed_area)
+            center = distance * np.array([np.cos(c * golden_angle), np.sin(c * golden_angle)])
+        pos[nodes] = center + local
+    return pos
+
+
+def main(argv=None):
+    """Print co-authorship statistics of an author sheet"""
+    parser = argparse.ArgumentParser(description='Co-authorship statistics of an author sheet.')
+    parser.add_argument('sheet', nargs='?', default=AUTHORS_SHEET, choices=list(AUTHOR_COLUMNS),
+                        help='Author sheet (default: authors)')
+    args = parser.parse_args(argv)
+
+    stats = graph_stats(load_graph(args.sheet))
+    print(f"{stats['authors']} authors, {stats['edges']} co-author pairs, "
+          f"mean degree {stats['mean_degree']:.2f}, {stats['isolated']} single authors")
+    print(f"{stats['components']} components, largest has {stats['largest_component']} authors")
+    for name, degree, papers in stats['top_authors']:
+        print(f'{degree:6d} co-authors  {papers:3d} papers  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Count cube of the selected papers over their categorical dimensions.
+
+Most figures count the same papers sliced different ways: per publication year, per
+publisher, per domain and type, per year and topic, ... Instead of keeping a sheet
+(or a groupby) for every slice, the papers are counted once over all dimensions:
+
+- every dimension of the paper table (see ``papers.py``) is factorized into integer
+  codes, with one extra code per dimension for a missing value;
+- the codes of a paper are combined into one integer (``np.ravel_multi_index``) and
+  ``np.bincount`` counts the papers per combined code; when the full cube would be
+  much larger than the corpus, only the occupied cells are kept (``np.unique``),
+  and when it has too many cells to number them in 64 bits, ``np.unique`` counts
+  the rows of paper codes directly.
+
+The cube is a list of occupied cells with their paper counts, so its size is
+bounded by the number of papers however many dimensions there are. A slice of any
+subset of dimensions is a roll-up: another ``np.bincount`` of the cells weighted by
+their counts, which costs time proportional to the number of cells, not papers.
+Papers without a value in one of the rolled-up dimensions are not counted.
+
+The cube of a workbook is kept for the lifetime of the process and covers every
+dimension whose sheets were read, so all figure tables built from the same sheets
+share one count.
+
+Usage:
+    python cube.py Year               # papers per year
+    python cube.py Year Domain -o domain_trends.csv
+"""
+import argparse
+import math
+from typing import NamedTuple
+
+import papers
+import profiling
+import workbook
+
+# Dimensions of the cube, all columns of ``papers.PAPER_COLUMNS``
+DIMENSIONS = ('Year', 'Item Type', 'Publisher', 'Venue', 'Type', 'Domain', 'Topic')
+DENSE_FACTOR = 4  # Count into a dense array while it has at most this many cells per paper
+COUNT_COLUMN = 'Number of papers'
+
+# Last cube built: (sheet row lists it was built from, dimensions, cube)
+_cached = None
+
+
+class CountCube(NamedTuple):
+    """Papers counted per combination of dimension values"""
+    dimensions: tuple  # Dimension names, one per axis
+    labels: tuple  # pandas Index of the (sorted) values of each dimension
+    cells: object  # (occupied cells, dimensions) codes; len(labels[axis]) marks a missing value
+    counts: object  # Papers per occupied cell
+
+
+def _factorize(column):
+    """Codes (missing values last) and plain-typed labels of a paper table column"""
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(column, sort=True)
+    if hasattr(uniques, 'categories'):
+        labels = pd.Index(uniques.astype(uniques.categories.dtype))
+    elif pd.api.types.is_integer_dtype(uniques.dtype):
+        labels = pd.Index(np.asarray(uniques, dtype=np.int64))
+    else:
+        labels = pd.Index(uniques)
+    codes = codes.astype(np.int64)
+    codes[codes < 0] = len(labels)
+    return codes, labels
+
+
+@profiling.profiled('transform')
+def build(table, dimensions=DIMENSIONS):
+    """Count cube of a paper table (one row per paper) over some of its columns"""
+    import numpy as np
+
+    dimensions = tuple(dimensions)
+    codes, labels = zip(*(_factorize(table[dimension]) for dimension in dimensions))
+    shape = tuple(len(axis_labels) + 1 for axis_labels in labels)
+    size = math.prod(shape)  # Exact, so it is checked before combining the codes could overflow
+    if size > np.iinfo(np.int64).max:
+        cells, counts = np.unique(np.stack(codes, axis=1), axis=0, return_counts=True)
+        return CountCube(dimensions, labels, cells, counts.astype(np.int64))
+    combined = np.ravel_multi_index(codes, shape)
+    if size <= DENSE_FACTOR * len(table) + 1024:
+        counts = np.bincount(combined, minlength=size)
+        occupied = np.flatnonzero(counts)
+        counts = counts[occupied]
+    else:
+        occupied, counts = np.unique(combined, return_counts=True)
+    cells = np.stack(np.unravel_index(occupied, shape), axis=1)
+    return CountCube(dimensions, labels, cells, counts.astype(np.int64))
+
+
+def rollup(cube, dimensions):
+    """Dense array of paper counts over some dimensions of the cube, one axis each"""
+    import numpy as np
+
+    axes = [cube.dimensions.index(dimension) for dimension in dimensions]
+    shape = tuple(len(cube.labels[axis]) for axis in axes)
+    cells = cube.cells[:, axes]
+    # Cells with a missing value in one of the dimensions are left out
+    valid = (cells < np.array(shape, dtype=np.int64)).all(axis=1)
+    combined = np.ravel_multi_index(cells[valid].T, shape)
+    counts = np.bincount(combined, weights=cube.counts[valid], minlength=int(np.prod(shape)))
+    return counts.astype(np.int64).reshape(shape)
+
+
+def frame(cube, dimensions, value_name=COUNT_COLUMN):
+    """Long table of the non-zero counts over some dimensions, ordered by their labels"""
+    import numpy as np
+    import pandas as pd
+
+    counts = rollup(cube, dimensions)
+    nonzero = np.nonzero(counts)
+    data = {dimension: cube.labels[cube.dimensions.index(dimension)][codes]
+            for dimension, codes in zip(dimensions, nonzero)}
+    data[value_name] = counts[nonzero]
+    return pd.DataFrame(data)
+
+
+def series(cube, dimension):
+    """Paper counts of the observed values of one dimension, by label"""
+    import pandas as pd
+
+    counts = rollup(cube, [dimension])
+    labels = cube.labels[cube.dimensions.index(dimension)]
+    return pd.Series(counts, index=labels.rename(dimension), name=COUNT_COLUMN)[counts > 0]
+
+
+def from_sheets(sheets, dimensions=DIMENSIONS):
+    """Cube of the papers in raw workbook sheets, reused while the sheets are the same objects
+
+    The cube has at least ``dimensions``, plus every other dimension of ``DIMENSIONS``
+    whose sheets are in ``sheets``, so that tables of other dimensions can reuse it.
+    """
+    global _cached
+    dimensions = tuple(dimension for dimension in DIMENSIONS if dimension in dimensions or
+                       all(sheet in sheets for sheet in papers.sheets_for([dimension]))) + \
+        tuple(dimension for dimension in dimensions if dimension not in DIMENSIONS)
+    sources = [sheets[name] for name in papers.sheets_for(dimensions)]
+    if (_cached is None or _cached[1] != dimensions or len(_cached[0]) != len(sources)
+            or any(old is not new for old, new in zip(_cached[0], sources))):
+        _cached = (sources, dimensions, build(papers.paper_table(sheets, dimensions), dimensions))
+    return _cached[2]
+
+
+def load_cube(dimensions=DIMENSIONS, workbook_path=workbook.MASTER_WORKBOOK):
+    """Cube of the selected papers of the master workbook, read through ``papers.load_papers``"""
+    return build(papers.load_papers(dimensions, workbook_path), dimensions)
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Paper counts over some dimensions of the count cube.')
+    parser.add_argument('dimensions', nargs='+', choices=DIMENSIONS, metavar='dimension',
+                        help=f"One or more of: {', '.join(DIMENSIONS)}")
+    parser.add_argument('-o', '--output', help='Write the counts to this CSV file')
+    args = parser.parse_args(argv)
+
+    table = frame(load_cube(), args.dimensions)
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f'{len(table)} rows written to {args.output}')
+    else:
+        print(table.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Near-duplicate detection over the screening records with MinHash and LSH.
+
+The same paper is often retrieved from several digital libraries, with small
+differences in punctuation, casing or abstract formatting. Comparing every pair of
+records is quadratic, so instead each record's title and abstract are normalized
+(lowercase, accents and punctuation removed) and cut into overlapping word
+shingles, and the shingle set is summarized by a MinHash signature: for each of
+``NUM_PERM`` random hash functions, the smallest hash of any shingle. Two
+signatures agree in a position with probability equal to the Jaccard similarity of
+the shingle sets.
+
+Locality-sensitive hashing splits the signatures into bands and puts records whose
+band is identical into the same bucket, so only records sharing a bucket become
+candidate pairs; this takes near-linear time. Candidates whose estimated similarity
+reaches the threshold are merged into clusters (union-find), and every record gets
+the id of its cluster. The records are written with a ``Duplicate Cluster`` and a
+``Cluster Size`` column next to their screening data.
+
+Usage:
+    python dedup.py                        # clusters of the "all" sheet
+    python dedup.py -t 0.8 -o clusters.csv # stricter threshold, other output file
+"""
+import argparse
+import os
+import re
+import unicodedata
+import zlib
+
+import profiling
+import screening
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_PATH = os.path.join(BASE_DIR, 'Data Table', 'Duplicate Clusters.csv')
+SHINGLE_SIZE = 3  # Words per shingle
+NUM_PERM = 128  # Hash functions per signature
+THRESHOLD = 0.7  # Estimated Jaccard similarity of near-duplicates
+SEED = 1  # Seed of the hash functions, fixed so cluster ids are reproducible
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text):
+    """Lowercase ASCII words of a text, without accents and punctuation"""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return _NON_WORD_RE.sub(' ', text.lower()).split()
+
+
+def shingles(words, size=SHINGLE_SIZE):
+    """Set of the overlapping ``size``-word shingles (a shorter text is one shingle)"""
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def hash_functions(num_perm=NUM_PERM, seed=SEED):
+    """Parameters (a, b) of the universal hash functions (a * x + b) mod p"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    # Below 2**31, so a * x + b stays below 2**64 for 32-bit shingle hashes
+    a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def signature(shingle_set, hashes):
+    """MinHash signature of a shingle set, or None for an empty set"""
+    import numpy as np
+
+    if not shingle_set:
+        return None
+    a, b = hashes
+    values = np.fromiter((zlib.crc32(s.encode()) for s in shingle_set), dtype=np.uint64,
+                         count=len(shingle_set))
+    permuted = (np.outer(a, values) + b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def lsh_bands(num_perm=NUM_PERM, threshold=THRESHOLD):
+    """Number of bands (and rows per band) whose S-curve threshold is closest to ``threshold``
+
+    Two records with Jaccard similarity s share at least one bucket with probability
+    1 - (1 - s**rows)**bands, which rises steeply around (1 / bands) ** (1 / rows).
+    """
+    options = [(bands, num_perm // bands) for bands in range(1, num_perm + 1) if num_perm % bands == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]  # Path halving
+        i = parent[i]
+    return i
+
+
+@profiling.profiled('transform')
+def cluster(signatures, threshold=THRESHOLD):
+    """Cluster ids (1, 2, ... in order of first appearance) of a list of signatures
+
+    Records without a signature (no title and abstract) are clusters of their own.
+    """
+    import numpy as np
+
+    n = len(signatures)
+    parent = list(range(n))
+    indices = np.array([i for i, sig in enumerate(signatures) if sig is not None], dtype=np.int64)
+    if len(indices) > 1:
+        matrix = np.stack([signatures[i] for i in indices])
+        bands, rows = lsh_bands(matrix.shape[1], threshold)
+        for band in range(bands):
+            # Records with an identical band share a bucket
+            _, buckets = np.unique(matrix[:, band * rows:(band + 1) * rows], axis=0, return_inverse=True)
+            buckets = buckets.ravel()
+            order = np.argsort(buckets, kind='stable')
+            starts = np.flatnonzero(np.r_[True, np.diff(buckets[order]) != 0])
+            ends = np.r_[starts[1:], len(order)]
+            for start, end in zip(starts, ends):
+                if end - start < 2:
+                    continue
+                members = order[start:end]
+                for x, i in enumerate(members):
+                    for j in members[x + 1:]:
+                        root_i = _find(parent, indices[i])
+                        root_j = _find(parent, indices[j])
+                        if root_i != root_j and np.mean(matrix[i] == matrix[j]) >= threshold:
+                            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    ids = {}
+    return [ids.setdefault(_find(parent, i), len(ids) + 1) for i in range(n)]
+
+
+def record_text(record):
+    """Title and abstract of a screening record as one string"""
+    return ' '.join(part for part in (record.title, record.abstract) if part)
+
+
+@profiling.profiled('transform')
+def signatures(records, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE):
+    """MinHash signature of every record's normalized title and abstract"""
+    hashes = hash_functions(num_perm)
+    return [signature(shingles(normalize(record_text(record)), shingle_size), hashes) for record in records]
+
+
+def find_duplicates(sheet=screening.ALL_SHEET, threshold=THRESHOLD, num_perm=NUM_PERM,
+                    shingle_size=SHINGLE_SIZE):
+    """Screening records of a sheet as a DataFrame with their duplicate cluster"""
+    import pandas as pd
+
+    with profiling.stage('load'):
+        records = list(screening.iter_records(sheet))
+    clusters = cluster(signatures(records, num_perm, shingle_size), threshold)
+    df = pd.DataFrame(records, columns=screening.ScreeningRecord._fields)
+    df.columns = list(screening.COLUMNS)
+    df['Duplicate Cluster'] = clusters
+    df['Cluster Size'] = df.groupby('Duplicate Cluster')['Duplicate Cluster'].transform('size')
+    return df
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Near-duplicate records of a screening sheet.')
+    parser.add_argument('sheet', nargs='?', default=screening.ALL_SHEET, help='Screening sheet (default: all)')
+    parser.add_argument('-t', '--threshold', type=float, default=THRESHOLD,
+                        help=f'Estimated Jaccard similarity of duplicates (default: {THRESHOLD})')
+    parser.add_argument('-o', '--output', default=OUTPUT_PATH, help='CSV file with the cluster column')
+    args = parser.parse_args(argv)
+
+    df = find_duplicates(args.sheet, args.threshold)
+    df.to_csv(args.output, index=False)
+    duplicates = df[df['Cluster Size'] > 1]
+    print(f'{len(df)} records, {df["Duplicate Cluster"].nunique()} clusters, '
+          f'{duplicates["Duplicate Cluster"].nunique()} with duplicates ({len(duplicates)} records)')
+    for cluster_id, group in duplicates.groupby('Duplicate Cluster'):
+        print(f'  cluster {cluster_id}:')
+        for _, row in group.iterrows():
+            print(f'    No {row["No"]}  {row["Source"] or "":<15}  {str(row["Title"])[:80]}')
+    print(f'Written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""
+Export stage: write a finished figure in several formats and resolutions at once.
+
+Scripts call ``save_figure`` instead of ``savefig``. The main file is written as
+before; extra exports are requested with ``MBRE_EXPORTS`` (or ``mbre_plots.py
+--export``), a comma-separated list of ``format`` or ``format@dpi`` entries, e.g.
+``MBRE_EXPORTS=png@600,png@72,pdf,svg``. Extra rasters are named ``<name>@<dpi>dpi.<ext>``
+and vector files ``<name>.<ext>``, next to the main file.
+
+The figure is built once by the script. Each raster resolution is drawn once into an
+RGBA buffer, and the buffers are then encoded (PNG compression, JPEG, ...) and
+written by a pool of threads while the next resolution or vector format is drawn;
+Pillow releases the GIL while encoding. Vector formats are drawn into memory and
+written by the same threads. Every file is written to a temporary file in its
+target directory and renamed into place, so concurrent builds never leave a
+half-written image behind.
+
+Outputs go to stable names in ``Figure/`` (``figN_<title>.png``, as in the paper).
+A file whose new bytes equal the existing ones is not rewritten, so its timestamp
+only changes when its content does. Every directory written to gets a
+``manifest.json`` with, per file, the figure that produced it, the SHA-256 of its
+content and the input hash of the build (see ``build_graph.py``), so an artifact
+store can skip uploading unchanged outputs.
+"""
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
+
+RASTER_FORMATS = {'png', 'jpg', 'jpeg', 'tif', 'tiff', 'webp'}
+VECTOR_FORMATS = {'pdf', 'svg', 'eps', 'ps'}
+_PIL_FORMATS = {'tif': 'tiff'}  # Extensions Pillow only knows under another name
+MANIFEST_NAME = 'manifest.json'
+
+# Paths written since the last reset, used for build dependency tracking like savefig
+saved_files = []
+# Manifest entries of the files written since the last reset: absolute path -> entry
+manifest_entries = {}
+# Set by mbre_plots.py workers, whose parent process writes the manifests instead
+defer_manifest = False
+
+
+def parse_exports(spec):
+    """Parse "png@600,pdf" into [('png', 600), ('pdf', None)]"""
+    exports = []
+    for entry in spec.split(','):
+        entry = entry.strip().lower()
+        if not entry:
+            continue
+        fmt, _, dpi = entry.partition('@')
+        fmt = fmt.lstrip('.')
+        if fmt not in RASTER_FORMATS | VECTOR_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}', expected one of "
+                             f"{', '.join(sorted(RASTER_FORMATS | VECTOR_FORMATS))}")
+        if dpi and fmt in VECTOR_FORMATS:
+            raise ValueError(f"Vector format '{fmt}' takes no resolution")
+        exports.append((fmt, int(dpi.removesuffix('dpi')) if dpi else None))
+    return exports
+
+
+def export_paths(path, dpi, exports):
+    """Target path, format and resolution of the main file and every extra export"""
+    stem, ext = os.path.splitext(path)
+    targets = {path: (ext.lstrip('.').lower() or 'png', dpi)}
+    for fmt, export_dpi in exports:
+        if fmt in VECTOR_FORMATS:
+            target = f'{stem}.{fmt}'
+        elif export_dpi is None or export_dpi == dpi:
+            target, export_dpi = f'{stem}.{fmt}', dpi
+        else:
+            target = f'{stem}@{export_dpi}dpi.{fmt}'
+        targets.setdefault(target, (fmt, export_dpi))
+    return targets
+
+
+def _same_content(path, data):
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, 'rb') as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def _write_atomic(path, data):
+    """Write bytes to a file via a temporary file, unless it already holds them"""
+    if _same_content(path, data):
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _input_hash():
+    """Name and input hash of the running figure script, from the data it read so far"""
+    script = getattr(sys.modules.get('__main__'), '__file__', None)
+    if not script or not os.path.isfile(script):
+        return None, None  # Interactive session or code read from stdin
+    import build_graph
+    import workbook
+
+    files = [os.path.relpath(path, build_graph.BASE_DIR) for path in workbook.accessed_files]
+    name = os.path.splitext(os.path.basename(script))[0]
+    return name, build_graph.input_hash(script, workbook.accessed_sheets, files=files)
+
+
+def update_manifest(entries):
+    """Merge {absolute path: entry} into the manifest of each file's directory"""
+    by_directory = {}
+    for path, entry in entries.items():
+        by_directory.setdefault(os.path.dirname(path), {})[os.path.basename(path)] = entry
+    for directory, directory_entries in by_directory.items():
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        manifest.update(directory_entries)
+        _write_atomic(manifest_path, (json.dumps(manifest, indent=2, sort_keys=True) + '\n').encode('utf-8'))
+
+
+def _record(contents, figure=None):
+    """Track written files {path: bytes} and add them to the manifest
+
+    The entries are attributed to ``figure``, by default the running script.
+    """
+    script, input_hash = _input_hash()
+    figure = figure or script
+    entries = {
+        os.path.abspath(path): {
+            'figure': figure,
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'bytes': len(data),
+            'input_hash': input_hash,
+        }
+        for path, data in contents.items()
+    }
+    saved_files.extend(entries)
+    manifest_entries.update(entries)
+    if not defer_manifest:
+        update_manifest(entries)
+
+
+def save_file(path, data, figure=None):
+    """Write a non-image output (text or bytes) like the figure exports"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    _write_atomic(path, data)
+    _record({path: data}, figure)
+
+
+def _encode(path, rgba, fmt, dpi, pil_kwargs):
+    """Encode an RGBA buffer exactly like savefig does, write it and return the bytes"""
+    import matplotlib.image as mpimg
+
+    buffer = io.BytesIO()
+    mpimg.imsave(buffer, rgba, format=_PIL_FORMATS.get(fmt, fmt), origin='upper', dpi=dpi,
+                 pil_kwargs=pil_kwargs)
+    data = buffer.getvalue()
+    _write_atomic(path, data)
+    return data
+
+
+def _draw(fig, dpi, savefig_kwargs):
+    """Draw the figure once at a resolution and return its RGBA pixels"""
+    import numpy as np
+
+    raw = io.BytesIO()
+    fig.savefig(raw, format='raw', dpi=dpi, **savefig_kwargs)
+    height, width = fig.canvas.buffer_rgba().shape[:2]
+    return np.frombuffer(raw.getbuffer(), dtype=np.uint8).reshape(height, width, 4)
+
+
+@profiling.profiled('export')
+def save_figure(fig, path, dpi=300, exports=None, figure=None, **savefig_kwargs):
+    """Save a figure to ``path`` plus every extra export, and return the written paths
+
+    ``exports`` is a list of (format, dpi) pairs or a spec string; by default it is
+    read from MBRE_EXPORTS. ``figure`` names the figure in the manifest (default: the
+    running script). Other keyword arguments are passed to ``savefig``.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    if exports is None:
+        exports = os.environ.get('MBRE_EXPORTS', '')
+    if isinstance(exports, str):
+        exports = parse_exports(exports)
+    targets = export_paths(os.fspath(path), dpi, exports)
+    pil_kwargs = savefig_kwargs.pop('pil_kwargs', None)
+
+    contents = {}
+    if not isinstance(fig.canvas, FigureCanvasAgg):
+        # No Agg canvas to read pixels from: plain savefig per file, still atomic
+        for target, (fmt, target_dpi) in targets.items():
+            buffer = io.BytesIO()
+            if fmt in RASTER_FORMATS:
+                fig.savefig(buffer, format=_PIL_FORMATS.get(fmt, fmt), dpi=target_dpi,
+                            pil_kwargs=pil_kwargs, **savefig_kwargs)
+            else:
+                fig.savefig(buffer, format=fmt, dpi=dpi, **savefig_kwargs)
+            contents[target] = buffer.getvalue()
+            _write_atomic(target, contents[target])
+        _record(contents, figure)
+        return list(targets)
+
+    with ThreadPoolExecutor(max_workers=min(len(targets), os.cpu_count() or 1)) as pool:
+        futures = {}
+        pixels = {}  # Rasters at the same resolution share one drawing
+        for target, (fmt, target_dpi) in targets.items():
+            if fmt in RASTER_FORMATS:
+                if target_dpi not in pixels:
+                    pixels[target_dpi] = _draw(fig, target_dpi, savefig_kwargs)
+                futures[target] = pool.submit(_encode, target, pixels[target_dpi], fmt, target_dpi, pil_kwargs)
+            else:
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format=fmt, dpi=dpi, **savefig_kwargs)
+                contents[target] = buffer.getvalue()
+                futures[target] = pool.submit(_write_atomic, target, contents[target])
+        for target, future in futures.items():
+            data = future.result()  # Re-raises encoding and write errors
+            if data is not None:
+                contents[target] = data
+    _record(contents, figure)
+    return list(targets)
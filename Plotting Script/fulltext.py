@@ -0,0 +1,443 @@
+"""
+Inverted full-text index over the selected papers for instant boolean and phrase queries.
+
+Each selected paper (a row of the "ordering (selected papers)" sheet) is one document:
+its title, its abstract (line N of ``abstract.txt`` belongs to the N-th paper row)
+and its extraction fields: topic, domain, type, technology, publication year and the
+quality score of the "evaluation" sheet. Words are lowercased and reduced to their
+stem with the stemmer of ``keywords.py``, so "models" finds "model" and "modeling".
+
+The index is kept in ``Plotting Script/.cache/fulltext/`` as flat NumPy arrays: the
+sorted vocabulary, the documents of every term (posting lists, sorted by document)
+and the word positions of every posting. The arrays are opened memory-mapped, so
+loading the index reads almost nothing and a query touches only the posting lists
+of its terms; the paper records of the hits are read by byte offset. A term is
+found by binary search in the vocabulary; AND intersects posting lists starting
+with the shortest one, phrases additionally compare word positions. The index is
+rebuilt when ``abstract.txt`` or one of the two sheets changes.
+
+Query syntax:
+    sysml scalability            both words in the title or abstract (AND is implicit)
+    sysml OR uml                 either word
+    sysml -uml, sysml NOT uml    first word but not the second
+    "goal model"                 phrase
+    topic:goal tech:"user story" field term or phrase (title, topic, domain, type,
+                                 tech), year:2016, score:5.5, id:S001
+    (sysml OR uml) AND safety    grouping
+
+Usage:
+    python fulltext.py "sysml scalability"
+    python fulltext.py --rebuild 'tech:kaos OR "goal model"'
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import time
+from typing import NamedTuple
+
+import keywords
+import sheet_cache
+import workbook
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_DIR = os.path.join(BASE_DIR, '.cache', 'fulltext')
+INDEX_VERSION = 1  # Bump when the tokenization or the file layout changes
+TERM_BYTES = 32  # Longer terms are truncated
+FIELD_GAP = 100  # Position gap between fields, so phrases never span two fields
+_MAX_PHRASE = 64  # Words per phrase query
+
+# Query field -> column of the selected-papers sheet
+TEXT_FIELDS = {
+    'title': 'Title',
+    'topic': 'Topic',
+    'domain': 'Domain',
+    'type': 'Type',
+    'tech': 'Technology',
+}
+# Fields matched as one whole value instead of word by word
+VALUE_FIELDS = {
+    'id': 'Id',
+    'year': 'Publication Year',
+}
+ARRAYS = ('terms', 'term_offsets', 'postings', 'position_offsets', 'positions')
+
+# Letters and digits; hyphenated words ("goal-oriented") become separate words
+_WORD_RE = re.compile(r'[A-Za-z0-9]+')
+_QUERY_RE = re.compile(r'\(|\)|-?(?:\w+:)?"[^"]*"|[^\s()]+')
+
+
+class Index(NamedTuple):
+    """Memory-mapped inverted index"""
+    terms: object  # Sorted vocabulary, fixed-width bytes
+    term_offsets: object  # Postings of term t: postings[term_offsets[t]:term_offsets[t + 1]]
+    postings: object  # Document numbers, ascending per term
+    position_offsets: object  # Positions of posting p: positions[position_offsets[p]:position_offsets[p + 1]]
+    positions: object  # Word positions, ascending per posting
+    document_offsets: object  # Byte offset of every document in documents.jsonl
+    directory: str
+
+
+def _words(text, stems):
+    """Index terms of a text, in order (``stems`` caches the stem of every word seen)"""
+    terms = []
+    for word in _WORD_RE.findall(text):
+        if word not in stems:
+            stems[word] = keywords.stem(word.lower())
+        terms.append(stems[word])
+    return terms
+
+
+def _value(value):
+    """Canonical text of a whole-value field ("2016", "5.5", "s001")
+
+    Numbers written as text (a query's "5.0") are read as numbers first, so they
+    match the indexed cell values ("5").
+    """
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            pass
+        else:
+            value = number if math.isfinite(number) else value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip().lower()
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _key(term):
+    return term.encode('utf-8')[:TERM_BYTES]
+
+
+def paper_documents(workbook_path=workbook.MASTER_WORKBOOK, abstracts=keywords.ABSTRACTS):
+    """Documents of the selected papers: {'id', 'row', 'line', 'title', 'fields'}"""
+    sheets = workbook.read_sheets([workbook.SELECTED_SHEET, workbook.EVALUATION_SHEET], workbook_path)
+    header, *rows = sheets[workbook.SELECTED_SHEET]
+    evaluation_header, *evaluation = sheets[workbook.EVALUATION_SHEET]
+    id_at, score_at = evaluation_header.index('Id'), evaluation_header.index('Score')
+    scores = {row[id_at]: row[score_at] for row in evaluation if len(row) > score_at and row[score_at] is not None}
+    with open(abstracts, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+
+    columns = {**TEXT_FIELDS, **VALUE_FIELDS, 'abstract': 'Abstract Note'}
+    at = {field: header.index(column) for field, column in columns.items()}
+    documents = []
+    for row_number, row in enumerate(rows, start=2):
+        if all(_is_blank(value) for value in row):
+            continue
+        fields = {field: row[i] for field, i in at.items() if i < len(row) and not _is_blank(row[i])}
+        line = len(documents) + 1  # Abstract lines follow the paper rows
+        if line <= len(lines):
+            fields['abstract'] = lines[line - 1]
+        else:
+            line = None
+        if fields.get('id') in scores:
+            fields['score'] = scores[fields['id']]
+        documents.append({
+            'id': fields.get('id'),
+            'row': row_number,
+            'line': line,
+            'title': fields.get('title'),
+            'fields': {field: _value(value) if field in VALUE_FIELDS or field == 'score' else str(value)
+                       for field, value in fields.items()},
+        })
+    return documents
+
+
+def build_index(documents):
+    """Arrays of the inverted index of a list of documents
+
+    Every word occurrence is collected as a (term id, document, position) triple in
+    flat integer arrays; one stable sort by term then groups them into posting lists
+    with their positions, both already in document and position order.
+    """
+    from array import array
+
+    import numpy as np
+
+    vocabulary = {}  # Index term -> id in order of first occurrence
+    stems = {}
+    term_ids, numbers, word_positions = array('I'), array('I'), array('I')
+    for number, document in enumerate(documents):
+        position = 0
+        for field, text in document['fields'].items():
+            if field in VALUE_FIELDS or field == 'score':
+                words, prefixes = [text], (f'{field}:',)
+            else:
+                words = _words(text, stems)
+                # Title words are found with and without "title:", abstract words without a prefix
+                prefixes = {'abstract': ('',), 'title': ('', 'title:')}.get(field, (f'{field}:',))
+            for prefix in prefixes:
+                term_ids.extend(vocabulary.setdefault(_key(prefix + word), len(vocabulary)) for word in words)
+                numbers.extend([number] * len(words))
+                word_positions.extend(range(position, position + len(words)))
+            position += len(words) + FIELD_GAP
+
+    terms = np.array(list(vocabulary), dtype=f'S{TERM_BYTES}')
+    order = np.argsort(terms)
+    rank = np.empty(len(terms), dtype=np.uint32)
+    rank[order] = np.arange(len(terms), dtype=np.uint32)
+    ids = rank[np.frombuffer(term_ids, dtype=np.uint32)]
+    occurrence_order = np.argsort(ids, kind='stable')
+    ids = ids[occurrence_order]
+    numbers = np.frombuffer(numbers, dtype=np.uint32)[occurrence_order]
+    positions = np.frombuffer(word_positions, dtype=np.uint32)[occurrence_order]
+
+    # A posting starts wherever the term or the document changes
+    starts = np.flatnonzero(np.r_[True, (ids[1:] != ids[:-1]) | (numbers[1:] != numbers[:-1])])
+    return {
+        'terms': terms[order],
+        'term_offsets': np.searchsorted(ids[starts], np.arange(len(terms) + 1)).astype(np.int64),
+        'postings': numbers[starts],
+        'position_offsets': np.r_[starts, len(ids)].astype(np.int64),
+        'positions': positions,
+    }
+
+
+def _source_key(workbook_path=workbook.MASTER_WORKBOOK, abstracts=keywords.ABSTRACTS):
+    """Key of the index inputs: abstract file content and the two sheets"""
+    keys = sheet_cache.sheet_keys(workbook_path)
+    digest = hashlib.sha1(f'{INDEX_VERSION}'.encode())
+    for sheet in (workbook.SELECTED_SHEET, workbook.EVALUATION_SHEET):
+        digest.update(f'{sheet}:{keys.get(sheet)}'.encode())
+    with open(abstracts, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def save_index(arrays, documents, key, index_dir=INDEX_DIR):
+    """Write the index to a new directory and swap it in place of the old one
+
+    Documents are stored one JSON line each, without their abstract, and read back
+    one at a time through their byte offsets.
+    """
+    import numpy as np
+
+    tmp_dir = f'{index_dir}.{os.getpid()}.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    for name in ARRAYS:
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), arrays[name])
+    offsets = [0]
+    with open(os.path.join(tmp_dir, 'documents.jsonl'), 'wb') as f:
+        for document in documents:
+            fields = {field: text for field, text in document['fields'].items() if field != 'abstract'}
+            offsets.append(offsets[-1] + f.write(
+                json.dumps({**document, 'fields': fields}, ensure_ascii=False).encode('utf-8') + b'\n'))
+    np.save(os.path.join(tmp_dir, 'document_offsets.npy'), np.array(offsets, dtype=np.int64))
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'key': key, 'documents': len(documents)}, f)
+    if os.path.exists(index_dir):
+        shutil.rmtree(index_dir)
+    os.replace(tmp_dir, index_dir)
+
+
+def _open(index_dir, key):
+    import numpy as np
+
+    try:
+        with open(os.path.join(index_dir, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != INDEX_VERSION or (key is not None and meta.get('key') != key):
+            return None
+        arrays = {name: np.load(os.path.join(index_dir, f'{name}.npy'), mmap_mode='r')
+                  for name in (*ARRAYS, 'document_offsets')}
+    except (OSError, ValueError):
+        return None
+    return Index(directory=index_dir, **arrays)
+
+
+def load_index(rebuild=False, workbook_path=workbook.MASTER_WORKBOOK, abstracts=keywords.ABSTRACTS,
+               index_dir=INDEX_DIR):
+    """Open the stored index, building it first if it is missing or out of date"""
+    key = _source_key(workbook_path, abstracts)
+    index = None if rebuild else _open(index_dir, key)
+    if index is None:
+        documents = paper_documents(workbook_path, abstracts)
+        save_index(build_index(documents), documents, key, index_dir)
+        index = _open(index_dir, None)
+    return index
+
+
+def document_count(index):
+    return len(index.document_offsets) - 1
+
+
+def document(index, number):
+    """Stored record of a document: paper id, sheet row, abstract line, title and fields"""
+    with open(os.path.join(index.directory, 'documents.jsonl'), 'rb') as f:
+        f.seek(int(index.document_offsets[number]))
+        return json.loads(f.readline())
+
+
+def postings(index, term):
+    """Ascending document numbers of an index term (empty if unknown)"""
+    import numpy as np
+
+    key = _key(term)
+    t = int(np.searchsorted(index.terms, key))
+    if t == len(index.terms) or index.terms[t] != key:
+        return np.empty(0, dtype=np.uint32)
+    return index.postings[index.term_offsets[t]:index.term_offsets[t + 1]]
+
+
+def intersect(a, b):
+    """Common values of two ascending arrays, by binary search of the shorter in the longer"""
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    import numpy as np
+
+    at = np.searchsorted(b, a)
+    found = at < len(b)
+    found[found] = b[at[found]] == a[found]
+    return a[found]
+
+
+def _occurrences(index, term, offset):
+    """Ascending (document << 32 | phrase start) keys of every occurrence of an index term
+
+    ``offset`` is the term's place in the phrase, so the occurrences of all terms of
+    a phrase that starts at the same word get the same key.
+    """
+    import numpy as np
+
+    key = _key(term)
+    t = int(np.searchsorted(index.terms, key))
+    if t == len(index.terms) or index.terms[t] != key:
+        return np.empty(0, dtype=np.uint64)
+    start, end = index.term_offsets[t], index.term_offsets[t + 1]
+    bounds = index.position_offsets[start:end + 1]
+    numbers = np.repeat(index.postings[start:end].astype(np.uint64), np.diff(bounds))
+    # Positions are shifted up by the phrase length so that position - offset stays positive
+    return numbers << np.uint64(32) | (index.positions[bounds[0]:bounds[-1]] + np.uint64(_MAX_PHRASE - offset))
+
+
+def phrase(index, terms):
+    """Documents containing the index terms next to each other, in order"""
+    import numpy as np
+
+    if len(terms) == 1:
+        return postings(index, terms[0])
+    if len(terms) > _MAX_PHRASE:
+        raise ValueError(f'Phrases are limited to {_MAX_PHRASE} words')
+    # Rarest terms first, and only in documents that contain all of them
+    candidates = sorted((postings(index, term) for term in terms), key=len)
+    documents = candidates[0]
+    for other in candidates[1:]:
+        documents = intersect(documents, other)
+    if not len(documents):
+        return documents
+    starts = None
+    for offset in sorted(range(len(terms)), key=lambda i: len(postings(index, terms[i]))):
+        keys = _occurrences(index, terms[offset], offset)
+        keys = keys[np.isin(keys >> np.uint64(32), documents)]
+        starts = keys if starts is None else intersect(starts, keys)
+    return np.unique((starts >> np.uint64(32)).astype(np.uint32))
+
+
+def _leaf(index, token):
+    """Documents matching one query word, phrase or field:value"""
+    field, _, text = token.rpartition(':') if re.match(r'^\w+:', token) else ('', '', token)
+    text = text.strip('"')
+    if field in VALUE_FIELDS or field == 'score':
+        return postings(index, f'{field}:{_value(text)}')
+    if field and field not in TEXT_FIELDS:
+        raise ValueError(f"Unknown field '{field}', expected one of "
+                         f"{', '.join([*TEXT_FIELDS, *VALUE_FIELDS, 'score'])}")
+    words = _words(text, {})
+    if not words:
+        raise ValueError(f"No searchable word in '{token}'")
+    if field:
+        return phrase(index, [f'{field}:{word}' for word in words])
+    return phrase(index, words)
+
+
+def search(index, query):
+    """Ascending document numbers matching a query (see the module docstring)"""
+    import numpy as np
+
+    tokens = _QUERY_RE.findall(query)
+    everything = np.arange(document_count(index), dtype=np.uint32)
+
+    def parse_or(pos):
+        result, pos = parse_and(pos)
+        while pos < len(tokens) and tokens[pos] == 'OR':
+            other, pos = parse_and(pos + 1)
+            result = np.union1d(result, other)
+        return result, pos
+
+    def parse_and(pos):
+        included, excluded = [], []
+        while pos < len(tokens) and tokens[pos] not in ('OR', ')'):
+            if tokens[pos] == 'AND':
+                pos += 1
+                continue
+            negate = tokens[pos] == 'NOT' or (tokens[pos].startswith('-') and len(tokens[pos]) > 1)
+            if tokens[pos] == 'NOT':
+                pos += 1
+            elif negate:
+                tokens[pos] = tokens[pos][1:]
+            operand, pos = parse_atom(pos)
+            (excluded if negate else included).append(operand)
+        if not included and not excluded:
+            raise ValueError('Empty query')
+        # Shortest posting list first keeps every intermediate result small
+        included.sort(key=len)
+        result = included[0] if included else everything
+        for other in included[1:]:
+            result = intersect(result, other)
+        for other in excluded:
+            result = result[~np.isin(result, other, assume_unique=True)]
+        return result, pos
+
+    def parse_atom(pos):
+        if pos >= len(tokens):
+            raise ValueError('Query ends unexpectedly')
+        if tokens[pos] == '(':
+            result, pos = parse_or(pos + 1)
+            if pos >= len(tokens) or tokens[pos] != ')':
+                raise ValueError("Missing ')'")
+            return result, pos + 1
+        return _leaf(index, tokens[pos]), pos + 1
+
+    result, pos = parse_or(0)
+    if pos < len(tokens):
+        raise ValueError(f"Unexpected '{tokens[pos]}'")
+    return result
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Query the selected papers (title, abstract, extraction fields).')
+    parser.add_argument('query', help='Query, e.g. \'sysml scalability\' or \'tech:kaos OR "goal model"\'')
+    parser.add_argument('-n', type=int, default=20, help='Number of papers to list (default: 20)')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the index first')
+    args = parser.parse_args(argv)
+
+    index = load_index(rebuild=args.rebuild)
+    start = time.perf_counter()
+    try:
+        matches = search(index, args.query)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+    print(f'{len(matches)} of {document_count(index)} papers ({elapsed * 1000:.2f} ms)')
+    for number in matches[:args.n]:
+        paper = document(index, number)
+        fields = paper['fields']
+        line = f"line {paper['line']}" if paper['line'] else 'no abstract line'
+        print(f"{paper['id']}  row {paper['row']}, {line}  [{fields.get('year', '')}, "
+              f"{fields.get('tech', '').replace(chr(10), ' ')}]  {paper['title']}")
+
+
+if __name__ == '__main__':
+    main()
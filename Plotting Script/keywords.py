@@ -0,0 +1,252 @@
+"""
+Local keyword engine for the tag cloud of the selected papers' abstracts.
+
+``abstract.txt`` holds one abstract per line. Its text is split into chunks at line
+boundaries and tokenized in a pool of worker processes. Each worker drops stop words,
+reduces every word to a stem with a light suffix stemmer and counts how often every
+surface form of every stem occurs. The merged counts form a term-frequency index
+that is saved in ``Plotting Script/.cache/keywords/``. When lines are appended to the
+file, only the new text is tokenized and its counts are added to the stored index;
+any other edit rebuilds the index from scratch.
+
+A cloud term is a stem, shown as its most frequent surface form, with the total count
+of all its forms (e.g. "model", "models" and "modeling" form one term).
+
+Usage:
+    python keywords.py              # top terms of abstract.txt
+    python keywords.py -n 100 FILE  # top 100 terms of another file
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import profiling
+import workbook
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ABSTRACTS = os.path.join(BASE_DIR, 'abstract.txt')
+INDEX_DIR = os.path.join(BASE_DIR, '.cache', 'keywords')
+INDEX_VERSION = 1  # Bump when the tokenizer, stop words or stemmer change
+CHUNK_BYTES = 4 * 1024 * 1024  # Text handed to one worker at a time
+MIN_LENGTH = 3  # Shorter words are ignored
+SIZE_CLASSES = 11  # Font size classes of the cloud (tagcloud0 ... tagcloud10)
+
+# Words are letters, optionally joined by hyphens (e.g. "model-based")
+_WORD_RE = re.compile(r"[A-Za-z]+(?:-[A-Za-z]+)*")
+
+STOP_WORDS = frozenset("""
+a about above across after again against all almost along already also although always
+am among an and another any are around as at be became because become been before
+being below between both but by can cannot could did do does doing done down during
+each either else enough etc even ever every few for from further get gets given gives
+had has have having he her here hers him his how however i if in into is it its itself
+just least less like made main make makes many may me might more most much must my
+neither no nor not now of off often on once one only onto or other others otherwise our
+ours out over own per rather same several she should since so some such than that the
+their theirs them then there therefore these they this those though through thus to too
+toward towards two under until up upon us very via was we well were what when where
+whether which while who whom whose why will with within without would yet you your
+paper papers study studies result results use used uses using article present presents
+""".split())
+
+
+def tokenize(text):
+    """Words of a text, in order, with their original case"""
+    return _WORD_RE.findall(text)
+
+
+def _undouble(stem):
+    # "modell" -> "model", "plann" -> "plan"
+    if len(stem) > 3 and stem[-1] == stem[-2] and stem[-1] not in 'lsz':
+        return stem[:-1]
+    if stem.endswith('ll') and len(stem) > 4:
+        return stem[:-1]
+    return stem
+
+
+def stem(word):
+    """Light suffix stemmer: plural, -ing, -ed and final -e endings of a lowercase word"""
+    if word.endswith('ies') and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')) and len(word) > 3:
+        word = word[:-1]
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return _undouble(word[:-len(suffix)])
+    # "generate", "generated" and "generating" share the stem "generat"
+    if word.endswith('e') and len(word) > 4:
+        return word[:-1]
+    return word
+
+
+def count_terms(text):
+    """Count the surface forms of every stem in a text
+
+    Returns {stem: {surface form: count}}; stop words and short words are skipped.
+    """
+    stems = {}
+    terms = {}
+    # Count each distinct surface form once, then stem only the distinct forms
+    for surface, count in Counter(tokenize(text)).items():
+        lower = surface.lower()
+        if lower not in stems:
+            stems[lower] = None if len(lower) < MIN_LENGTH or lower in STOP_WORDS else stem(lower)
+        key = stems[lower]
+        if key is not None:
+            forms = terms.setdefault(key, {})
+            forms[surface] = forms.get(surface, 0) + count
+    return terms
+
+
+def _count_chunk(data):
+    return count_terms(data.decode('utf-8', errors='replace'))
+
+
+def _chunks(data, chunk_bytes=CHUNK_BYTES):
+    """Split bytes into pieces of about ``chunk_bytes`` that end at line boundaries"""
+    start = 0
+    while start < len(data):
+        end = data.find(b'\n', min(start + chunk_bytes, len(data)) - 1)
+        end = len(data) if end < 0 else end + 1
+        yield data[start:end]
+        start = end
+
+
+def _merge(terms, counts):
+    for key, forms in counts.items():
+        target = terms.setdefault(key, {})
+        for surface, count in forms.items():
+            target[surface] = target.get(surface, 0) + count
+
+
+def count_text(data, jobs=None, chunk_bytes=CHUNK_BYTES):
+    """Term counts of UTF-8 text, tokenized in parallel when it spans several chunks"""
+    chunks = list(_chunks(data, chunk_bytes))
+    terms = {}
+    if len(chunks) <= 1:
+        for chunk in chunks:
+            _merge(terms, _count_chunk(chunk))
+        return terms
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for counts in pool.map(_count_chunk, chunks):
+            _merge(terms, counts)
+    return terms
+
+
+def _index_path(source):
+    name = hashlib.sha1(os.path.abspath(source).encode()).hexdigest()[:16]
+    return os.path.join(INDEX_DIR, f'{name}.json')
+
+
+def _empty_index(source):
+    return {'version': INDEX_VERSION, 'source': os.path.abspath(source),
+            'size': 0, 'digest': hashlib.sha1().hexdigest(), 'documents': 0, 'terms': {}}
+
+
+def load_index(source=ABSTRACTS):
+    """Read the stored index of a text file, or an empty one"""
+    try:
+        with open(_index_path(source), encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return _empty_index(source)
+    return index if index.get('version') == INDEX_VERSION else _empty_index(source)
+
+
+def save_index(index, source=ABSTRACTS):
+    """Write the index atomically"""
+    path = _index_path(source)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _documents(data):
+    return sum(1 for line in data.splitlines() if line.strip())
+
+
+@profiling.profiled('load')
+def update_index(source=ABSTRACTS, jobs=None):
+    """Bring the stored index of a text file up to date and return it
+
+    Text appended since the last update to a file that ended with a newline is
+    counted and added to the stored counts; any other change rebuilds the index.
+    """
+    workbook.accessed_files.add(os.path.abspath(source))
+    with open(source, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    index = load_index(source)
+    size = index['size']
+    if size == len(data) and index['digest'] == digest:
+        return index
+    appended = (0 < size < len(data)
+                and data[size - 1:size] == b'\n'
+                and hashlib.sha1(data[:size]).hexdigest() == index['digest'])
+    if not appended:
+        index = _empty_index(source)
+        size = 0
+
+    new = data[size:]
+    _merge(index['terms'], count_text(new, jobs))
+    index['documents'] += _documents(new)
+    index['size'] = len(data)
+    index['digest'] = digest
+    save_index(index, source)
+    return index
+
+
+def top_terms(index, n=50, exclude=(), min_count=1):
+    """The ``n`` most frequent terms as (label, count) pairs, most frequent first
+
+    The label of a term is its most frequent surface form. ``exclude`` holds extra
+    words (any form) to leave out of the result without rebuilding the index.
+    """
+    excluded = {stem(word.lower()) for word in exclude}
+    terms = []
+    for key, forms in index['terms'].items():
+        total = sum(forms.values())
+        if key in excluded or total < min_count:
+            continue
+        label = max(forms.items(), key=lambda item: (item[1], item[0]))[0]
+        terms.append((label, total))
+    terms.sort(key=lambda item: (-item[1], item[0].lower()))
+    return terms[:n]
+
+
+def size_classes(terms, classes=SIZE_CLASSES):
+    """Font size class (0 ... classes - 1) of each term, on a log scale of its count"""
+    if not terms:
+        return []
+    counts = [math.log(count) for _, count in terms]
+    low, high = min(counts), max(counts)
+    if high == low:
+        return [classes - 1] * len(terms)
+    return [min(int((classes - 1) * (c - low) / (high - low)), classes - 1) for c in counts]
+
+
+def main(argv=None):
+    """Print the top terms of a text file"""
+    parser = argparse.ArgumentParser(description='Top keywords of a file with one abstract per line.')
+    parser.add_argument('source', nargs='?', default=ABSTRACTS, help='Text file (default: abstract.txt)')
+    parser.add_argument('-n', type=int, default=50, help='Number of terms (default: 50)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Number of worker processes')
+    args = parser.parse_args(argv)
+
+    index = update_index(args.source, args.jobs)
+    print(f"{index['documents']} abstracts, {len(index['terms'])} terms")
+    for label, count in top_terms(index, args.n):
+        print(f'{count:8d}  {label}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+mbre-plots: build all figures in one command.
+
+Figure scripts are the capitalised ``.py`` files in this directory (lowercase modules
+such as ``workbook.py`` are shared helpers). Each script is run in a pool of worker
+processes with the non-interactive Agg backend, from this directory so that relative
+output paths keep working. Workers import pandas/matplotlib once and then build many
+figures, and the workbook sheets are parsed once up front into the on-disk cache.
+Builds are incremental: only figures whose inputs changed since their last build
+are rendered again (see ``build_graph.py``).
+
+Usage:
+    python mbre_plots.py                    # build every figure
+    python mbre_plots.py -j 4 "Publisher"   # build selected figures with 4 workers
+    python mbre_plots.py --force            # rebuild even if nothing changed
+    python mbre_plots.py --export png@600 pdf   # also write 600 dpi PNGs and PDFs
+    python mbre_plots.py --list             # list the figure scripts
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import re
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def discover_figures(base_dir=BASE_DIR):
+    """Return {figure name: script path} for every figure script"""
+    figures = {}
+    for path in sorted(glob.glob(os.path.join(base_dir, '*.py'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name[:1].isupper():
+            figures[name] = path
+    return figures
+
+
+def _init_worker(base_dir):
+    """Prepare a worker process: batch mode (Agg backend), script directory, warm imports"""
+    os.environ['MBRE_BATCH'] = '1'
+    os.environ['MPLBACKEND'] = 'Agg'
+    os.chdir(base_dir)
+    if base_dir not in sys.path:
+        sys.path.insert(0, base_dir)
+    import export
+    export.defer_manifest = True  # The parent process merges the manifest entries
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot  # noqa: F401
+    import pandas  # noqa: F401
+    import style
+    style.preload()  # Fonts and palettes, shared by every figure this worker builds
+
+
+def build_figure(name, path):
+    """Run one figure script and report its outcome
+
+    Returns a dict with the figure name, status ('ok' or 'failed'), wall time in
+    seconds, captured output, the sheets and data files it read, the files it saved
+    and their manifest entries (see ``export.py``), the recorded stages (with
+    MBRE_PROFILE set, see ``profiling.py``) and, on failure, the error. A run that
+    saves no file failed too, so it is not recorded as up to date.
+    """
+    import runpy
+    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+    import export
+    import profiling
+    import workbook
+
+    # Record every file the script saves
+    outputs = []
+    original_savefig = Figure.savefig
+
+    def savefig(self, fname, *args, **kwargs):
+        if isinstance(fname, (str, os.PathLike)):
+            outputs.append(os.path.abspath(fname))
+        return original_savefig(self, fname, *args, **kwargs)
+
+    Figure.savefig = savefig
+    workbook.accessed_sheets.clear()
+    workbook.accessed_files.clear()
+    export.saved_files.clear()
+    export.manifest_entries.clear()
+    profiling.reset()
+    output = io.StringIO()
+    error = None
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output), profiling.stage(name):
+            runpy.run_path(path, run_name='__main__')
+    except BaseException as e:  # Scripts may call exit() on errors
+        if isinstance(e, KeyboardInterrupt):
+            raise
+        error = traceback.format_exc()
+    finally:
+        Figure.savefig = original_savefig
+        plt.close('all')
+    elapsed = time.perf_counter() - start
+    if error is None and not outputs and not export.saved_files:
+        error = 'No output file was saved'
+        last_line = output.getvalue().strip().splitlines()[-1:]
+        if last_line:
+            error += f' (last output: {last_line[0]})'
+
+    return {
+        'figure': name,
+        'status': 'failed' if error else 'ok',
+        'seconds': elapsed,
+        'output': output.getvalue(),
+        'sheets': sorted(workbook.accessed_sheets),
+        'files': sorted(workbook.accessed_files),
+        'outputs': outputs + export.saved_files,
+        'manifest': dict(export.manifest_entries),
+        'profile': dict(profiling.records),
+        'error': error,
+    }
+
+
+def figure_tables(path):
+    """Names of the workbook tables a figure script uses (quoted in its source)"""
+    import workbook
+
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    return [name for name in workbook.TABLES if re.search(rf"""['"]{re.escape(name)}['"]""", source)]
+
+
+def warm_cache(figures):
+    """Parse the sheets of the figures' tables once, so workers read the on-disk cache
+
+    Returns {table name: error message} for tables whose sheets could not be read;
+    the figures using them still run (and fail) in isolation in the workers.
+    """
+    import sheet_cache
+    import workbook
+
+    errors = {}
+    if not sheet_cache.enabled():
+        return errors
+    tables = {table for path in figures.values() for table in figure_tables(path)}
+    for table in sorted(tables):
+        try:
+            workbook.read_sheets(workbook.table_sheets(table))
+        except Exception as e:
+            errors[table] = f'{type(e).__name__}: {e}'
+    return errors
+
+
+def build_all(figures, jobs=None):
+    """Build figures in parallel and return their results in completion order"""
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(BASE_DIR,)) as pool:
+        futures = [pool.submit(build_figure, name, path) for name, path in figures.items()]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(prog='mbre-plots', description='Build the MBRE figures in parallel.')
+    parser.add_argument('figures', nargs='*', help='Figure script names (default: all)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--list', action='store_true', help='List figure scripts and exit')
+    parser.add_argument('--force', action='store_true', help='Rebuild figures even if they are up to date')
+    parser.add_argument('--export', nargs='+', metavar='FORMAT[@DPI]', default=[],
+                        help='Extra formats/resolutions of every figure, e.g. png@600 pdf svg (see export.py)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print the output of each script')
+    args = parser.parse_args(argv)
+
+    figures = discover_figures()
+    if args.list:
+        print('\n'.join(figures))
+        return 0
+
+    unknown = [name for name in args.figures if name not in figures]
+    if unknown:
+        parser.error(f"Unknown figure(s): {', '.join(unknown)}")
+    if args.figures:
+        figures = {name: figures[name] for name in args.figures}
+
+    sys.path.insert(0, BASE_DIR)
+    import build_graph
+    import export
+    import profiling
+    import sheet_cache
+    import workbook
+
+    if args.export:
+        os.environ['MBRE_EXPORTS'] = ','.join(args.export)  # Inherited by the workers
+    try:
+        export.parse_exports(os.environ.get('MBRE_EXPORTS', ''))
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    state = build_graph.load_state()
+    sheet_keys = sheet_cache.sheet_keys(workbook.MASTER_WORKBOOK)
+    if not args.force:
+        stale = build_graph.stale_figures(figures, state)
+        for name in figures:
+            if name not in stale:
+                print(f"{name}: up to date")
+        figures = stale
+    if not figures:
+        return 0
+
+    for table, error in warm_cache(figures).items():
+        print(f"Warning: could not read the sheets of table '{table}': {error}")
+    results = build_all(figures, args.jobs)
+    for result in results:
+        profiling.merge(result['profile'])
+        export.update_manifest(result['manifest'])
+        if result['status'] == 'ok':
+            build_graph.record(state, result['figure'], figures[result['figure']],
+                               result['sheets'], result['outputs'], sheet_keys, result['files'])
+        else:
+            state.pop(result['figure'], None)  # Rebuilt next time whatever changed
+    build_graph.save_state(state)
+    total = time.perf_counter() - start
+
+    # Per-figure timings, slowest first
+    width = max(len(name) for name in figures)
+    for result in sorted(results, key=lambda r: -r['seconds']):
+        print(f"{result['figure']:<{width}}  {result['status']:<6}  {result['seconds']:6.2f} s")
+        if args.verbose and result['output']:
+            print(result['output'].rstrip())
+        if result['error']:
+            print(result['error'].rstrip())
+
+    failed = [r['figure'] for r in results if r['status'] != 'ok']
+    print(f"Built {len(results) - len(failed)}/{len(results)} figures in {total:.2f} s")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Per-stage timing and memory instrumentation of the figure builds.
+
+Set ``MBRE_PROFILE=1`` to record the wall time, CPU time and peak Python memory
+(``tracemalloc``) of every stage: reading sheets (load), deriving tables (transform),
+drawing (render) and ``savefig``, which draws and encodes the file (save). Stages
+nest, and each one is identified by its stack of enclosing stages. A figure script
+run on its own is the root stage, so the script's own plotting code shows up as its
+self time. At exit a tree summary is printed to stderr, and with
+``MBRE_PROFILE_OUTPUT=<file>`` the stacks are also appended in the collapsed
+("folded") format read by flamegraph.pl and speedscope, with self wall time in
+microseconds.
+
+When ``MBRE_PROFILE`` is unset, ``stage`` returns a shared no-op context manager and
+``profiled`` returns the function unchanged, so instrumented code costs nothing.
+Tracing memory slows down allocation-heavy code (imports, pandas), so compare
+profiled runs with each other rather than with plain ones.
+
+Usage:
+    with profiling.stage('transform'):
+        ...
+
+    @profiling.profiled('load')
+    def read_sheets(...):
+        ...
+"""
+import atexit
+import contextlib
+import functools
+import os
+import sys
+import time
+
+ENABLED = os.environ.get('MBRE_PROFILE', '') not in ('', '0')
+OUTPUT = os.environ.get('MBRE_PROFILE_OUTPUT', '')
+
+_NULL_STAGE = contextlib.nullcontext()
+
+# Stack path (tuple of stage names) -> [calls, wall s, CPU s, peak bytes above the stage's start]
+records = {}
+# Open stages, innermost last: [path, memory at entry, peak memory seen so far]
+_stack = []
+_root = None  # Root stage of a script run, closed at exit
+
+
+@contextlib.contextmanager
+def _recorded(name):
+    import tracemalloc
+
+    current, peak = tracemalloc.get_traced_memory()
+    if _stack:
+        _stack[-1][2] = max(_stack[-1][2], peak)  # Keep the parent's peak before resetting it
+    tracemalloc.reset_peak()
+    frame = [(_stack[-1][0] if _stack else ()) + (name,), current, current]
+    _stack.append(frame)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        peak = max(frame[2], tracemalloc.get_traced_memory()[1])
+        del _stack[next(i for i, open_frame in enumerate(_stack) if open_frame is frame)]
+        if _stack:
+            _stack[-1][2] = max(_stack[-1][2], peak)
+        entry = records.setdefault(frame[0], [0, 0.0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += wall
+        entry[2] += cpu
+        entry[3] = max(entry[3], peak - frame[1])
+
+
+def stage(name):
+    """Context manager recording one stage (a no-op unless profiling is enabled)"""
+    return _recorded(name) if ENABLED else _NULL_STAGE
+
+
+def profiled(name):
+    """Decorator recording every call of a function as a stage"""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _recorded(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def reset():
+    """Forget the recorded stages (stages still open are kept)"""
+    records.clear()
+
+
+def merge(other):
+    """Add stages recorded elsewhere, e.g. in a worker process"""
+    for path, (calls, wall, cpu, peak) in other.items():
+        entry = records.setdefault(tuple(path), [0, 0.0, 0.0, 0])
+        entry[0] += calls
+        entry[1] += wall
+        entry[2] += cpu
+        entry[3] = max(entry[3], peak)
+
+
+def _self_wall(path):
+    children = sum(entry[1] for other, entry in records.items()
+                   if len(other) == len(path) + 1 and other[:len(path)] == path)
+    # Children run in parallel worker processes can add up to more than their parent
+    return max(records[path][1] - children, 0.0)
+
+
+def summary():
+    """Tree of the recorded stages with calls, wall, self, CPU time and peak memory"""
+    lines = [f"{'stage':<40} {'calls':>6} {'wall s':>9} {'self s':>9} {'cpu s':>9} {'peak MB':>9}"]
+    for path in sorted(records):
+        calls, wall, cpu, peak = records[path]
+        label = '  ' * (len(path) - 1) + path[-1]
+        lines.append(f'{label:<40} {calls:>6} {wall:>9.3f} {_self_wall(path):>9.3f} '
+                     f'{cpu:>9.3f} {peak / 2 ** 20:>9.1f}')
+    return '\n'.join(lines)
+
+
+def folded():
+    """The stacks in collapsed format: "root;child;stage <self wall time in µs>" per line"""
+    return ''.join(f"{';'.join(path)} {round(_self_wall(path) * 1e6)}\n" for path in sorted(records))
+
+
+def _report():
+    if _root is not None:
+        _root.__exit__(None, None, None)
+    if not records:
+        return
+    print(summary(), file=sys.stderr)
+    if OUTPUT:
+        with open(OUTPUT, 'a', encoding='utf-8') as f:
+            f.write(folded())
+
+
+def _instrument_savefig():
+    """Record every Figure.savefig as a 'save' stage"""
+    from matplotlib.figure import Figure
+
+    Figure.savefig = profiled('save')(Figure.savefig)
+
+
+def _start():
+    global _root
+    import multiprocessing
+    import tracemalloc
+
+    tracemalloc.start()
+    _instrument_savefig()
+    if multiprocessing.parent_process() is not None:
+        return  # Worker processes hand their stages to the parent instead of reporting
+    main_file = getattr(sys.modules.get('__main__'), '__file__', None)
+    if main_file:
+        # The script itself is the root stage, open until exit
+        _root = _recorded(os.path.splitext(os.path.basename(main_file))[0])
+        _root.__enter__()
+    atexit.register(_report)
+
+
+if ENABLED:
+    _start()
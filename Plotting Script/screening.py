@@ -0,0 +1,210 @@
+"""
+Streaming reader for the screening sheets ("all" and "candidates").
+
+The screening sheets list every retrieved paper with its screening decision and can
+grow far beyond what fits comfortably in a DataFrame. This module reads them with
+openpyxl's read-only parser one row at a time and yields typed records in fixed-size
+chunks, so counts over the whole sheet (records, selected papers, exclusion reasons)
+are computed in constant memory. ``prisma_counts`` aggregates the review stages shown
+in the review process figure in one pass over the screening and selected-paper sheets.
+
+Usage:
+    python screening.py            # summary of the "all" and "candidates" sheets
+"""
+from collections import Counter
+from typing import NamedTuple, Optional
+
+import profiling
+import workbook
+
+ALL_SHEET = 'all'
+CANDIDATES_SHEET = 'candidates'
+CHUNK_SIZE = 10000
+
+# Sheet column -> record field ("Exclution Reason" is spelled as in the workbook)
+COLUMNS = {
+    'No': 'no',
+    'Level': 'level',
+    'Source': 'source',
+    'Item Type': 'item_type',
+    'Publication Year': 'year',
+    'Selected': 'selected',
+    'Exclution Reason': 'exclusion_reason',
+    'Title': 'title',
+    'Abstract Note': 'abstract',
+}
+
+
+class ScreeningRecord(NamedTuple):
+    """One screened paper"""
+    no: Optional[int]
+    level: Optional[str]
+    source: Optional[str]
+    item_type: Optional[str]
+    year: Optional[int]
+    selected: bool
+    exclusion_reason: Optional[str]
+    title: Optional[str]
+    abstract: Optional[str]
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _int(value):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return int(float(value))
+
+
+def _record(values):
+    no, level, source, item_type, year, selected, reason, title, abstract = values
+    return ScreeningRecord(
+        no=_int(no),
+        level=_text(level),
+        source=_text(source),
+        item_type=_text(item_type),
+        year=_int(year),
+        selected=bool(_int(selected)),
+        exclusion_reason=_text(reason),
+        title=_text(title),
+        abstract=_text(abstract),
+    )
+
+
+def iter_columns(sheet, columns, workbook_path=workbook.MASTER_WORKBOOK):
+    """Stream the given columns of a sheet (header in the first row) as lists of values
+
+    Columns missing from the sheet are None; blank rows are skipped.
+    """
+    from openpyxl import load_workbook
+
+    workbook.accessed_sheets.add(sheet)  # Report the dependency like workbook.read_sheets does
+    wb = load_workbook(workbook_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet]
+        ws.reset_dimensions()
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, ())
+        positions = [header.index(col) if col in header else None for col in columns]
+        for row in rows:
+            values = [row[i] if i is not None and i < len(row) else None for i in positions]
+            if all(v is None or (isinstance(v, str) and not v.strip()) for v in values):
+                continue
+            yield values
+    finally:
+        wb.close()
+
+
+def iter_records(sheet=ALL_SHEET, workbook_path=workbook.MASTER_WORKBOOK):
+    """Yield the rows of a screening sheet as ScreeningRecord, one at a time
+
+    Columns missing from a sheet (e.g. the exclusion reason in "candidates") are None.
+    """
+    for values in iter_columns(sheet, COLUMNS, workbook_path):
+        yield _record(values)
+
+
+def iter_chunks(sheet=ALL_SHEET, chunk_size=CHUNK_SIZE, workbook_path=workbook.MASTER_WORKBOOK):
+    """Yield lists of at most ``chunk_size`` records"""
+    chunk = []
+    for record in iter_records(sheet, workbook_path):
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def summarize(sheet=ALL_SHEET, chunk_size=CHUNK_SIZE, workbook_path=workbook.MASTER_WORKBOOK):
+    """Record, selection and exclusion-reason counts of a screening sheet in one pass"""
+    records = selected = 0
+    reasons = Counter()
+    sources = Counter()
+    for chunk in iter_chunks(sheet, chunk_size, workbook_path):
+        records += len(chunk)
+        selected += sum(record.selected for record in chunk)
+        reasons.update(record.exclusion_reason for record in chunk
+                       if not record.selected and record.exclusion_reason)
+        sources.update(record.source for record in chunk if record.source)
+    return {
+        'records': records,
+        'selected': selected,
+        'excluded': records - selected,
+        'exclusion_reasons': dict(reasons.most_common()),
+        'sources': dict(sources.most_common()),
+    }
+
+
+@profiling.profiled('load')
+def prisma_counts(chunk_size=CHUNK_SIZE, workbook_path=workbook.MASTER_WORKBOOK):
+    """Counts for every stage of the review, reading each sheet once
+
+    Records in "all" that are not in "candidates" were excluded during title/abstract
+    screening, excluded candidates during full-text review. Returns a dict with the
+    number of retrieved records (and per source), candidates, selected papers (and per
+    paper type) and the exclusion-reason histogram of both screening stages.
+    """
+    # Candidate record numbers as a bitmap (one byte per number), which stays small
+    # even for millions of records
+    is_candidate = bytearray()
+    candidates = 0
+    for chunk in iter_chunks(CANDIDATES_SHEET, chunk_size, workbook_path):
+        candidates += len(chunk)
+        for record in chunk:
+            if record.no is None:
+                continue
+            if record.no >= len(is_candidate):
+                is_candidate.extend(bytes(max(record.no + 1, 2 * len(is_candidate)) - len(is_candidate)))
+            is_candidate[record.no] = 1
+
+    retrieved = 0
+    sources = Counter()
+    screening_reasons = Counter()
+    full_text_reasons = Counter()
+    for chunk in iter_chunks(ALL_SHEET, chunk_size, workbook_path):
+        retrieved += len(chunk)
+        sources.update(record.source for record in chunk if record.source)
+        for record in chunk:
+            if record.selected:
+                continue
+            reason = record.exclusion_reason or 'unspecified'
+            if record.no is not None and record.no < len(is_candidate) and is_candidate[record.no]:
+                full_text_reasons[reason] += 1
+            else:
+                screening_reasons[reason] += 1
+
+    types = Counter()
+    for paper_type, in iter_columns(workbook.SELECTED_SHEET, ['Type-0'], workbook_path):
+        types[_text(paper_type) or 'unspecified'] += 1
+
+    return {
+        'retrieved': retrieved,
+        'sources': dict(sources.most_common()),
+        'screening_excluded': sum(screening_reasons.values()),
+        'screening_reasons': dict(screening_reasons.most_common()),
+        'candidates': candidates,
+        'full_text_excluded': sum(full_text_reasons.values()),
+        'full_text_reasons': dict(full_text_reasons.most_common()),
+        'selected': sum(types.values()),
+        'types': dict(sorted(types.items())),
+    }
+
+
+def main():
+    """Print a screening summary of the "all" and "candidates" sheets"""
+    for sheet in (ALL_SHEET, CANDIDATES_SHEET):
+        summary = summarize(sheet)
+        print(f'Sheet "{sheet}": {summary["records"]} records, '
+              f'{summary["selected"]} selected, {summary["excluded"]} excluded')
+        for reason, count in summary['exclusion_reasons'].items():
+            print(f'    {count:6d}  {reason}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""
+On-disk cache of parsed workbook sheets.
+
+Each sheet is keyed by the checksums of its own XML part and of the shared string
+table inside the .xlsx archive, which ``zipfile`` reports without decompressing
+anything. Only sheets whose key changed are parsed again. Cached sheets are stored
+as uncompressed Feather files in a long "one row per cell" layout, which keeps the
+sparse pivot sheets small and preserves cell types, ordered by column and row so
+the cells of a column are contiguous. ``load`` turns a cached sheet
+back into Python row lists, converting every cell; ``load_table`` and ``columns``
+instead hand out the memory-mapped Arrow columns (or numpy views and slices of
+them), so reading a few columns of a large sheet does not convert the rest of it.
+The cache directory has a size cap; the least recently used files are evicted first.
+
+Feather support comes from pyarrow. Without it the cache is disabled and the
+workbook is simply parsed every time.
+"""
+import datetime
+import hashlib
+import json
+import os
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import NamedTuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Set MBRE_CACHE_DIR to an empty string to disable the cache
+CACHE_DIR = os.environ.get('MBRE_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'sheets'))
+CACHE_SIZE_MB = float(os.environ.get('MBRE_CACHE_SIZE_MB', 256))
+CACHE_VERSION = 2  # Bump when the stored layout changes
+
+_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Cell kinds in the stored layout
+_NUMBER, _INTEGER, _TEXT, _BOOL, _DATETIME = range(5)
+
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def enabled():
+    """Whether cached sheets can be read and written"""
+    return bool(CACHE_DIR) and _arrow() is not None
+
+
+def sheet_keys(workbook_path):
+    """Content key of every sheet, computed from the zip directory only"""
+    with zipfile.ZipFile(workbook_path) as zf:
+        infos = {info.filename: info for info in zf.infolist()}
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+        rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+
+    targets = {}
+    for rel in rels.iter(f'{_PKG_REL_NS}Relationship'):
+        target = rel.get('Target')
+        target = target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+        targets[rel.get('Id')] = posixpath.normpath(target)
+
+    shared = infos.get('xl/sharedStrings.xml')
+    shared_sig = f'{shared.CRC}:{shared.file_size}' if shared else '-'
+
+    keys = {}
+    for sheet in workbook.iter(f'{_MAIN_NS}sheet'):
+        part = infos[targets[sheet.get(f'{_REL_NS}id')]]
+        signature = f'{CACHE_VERSION}|{sheet.get("name")}|{part.CRC}:{part.file_size}|{shared_sig}'
+        keys[sheet.get('name')] = hashlib.sha1(signature.encode('utf-8')).hexdigest()
+    return keys
+
+
+class SheetColumn(NamedTuple):
+    """Non-empty cells of one sheet column below its header, in row order"""
+    rows: object  # Sheet row of each cell (numpy int32)
+    kinds: object  # Cell kind (numpy int8)
+    numbers: object  # Value of number, integer and bool cells, NaN for the others (numpy float64)
+    texts: object  # Value of text and date cells, null for the others (pyarrow string array)
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, f'{key}.feather')
+
+
+def load_table(key):
+    """Return the cached sheet as a memory-mapped Arrow table (one row per cell), or None on a miss"""
+    if not enabled():
+        return None
+    path = _path(key)
+    try:
+        table = _arrow().feather.read_table(path, memory_map=True)
+    except (OSError, ValueError, KeyError):
+        return None
+    os.utime(path)  # Mark as recently used
+    return table
+
+
+def height(table):
+    """Number of rows of a cached sheet, trailing empty rows included"""
+    return int(table.schema.metadata[b'n_rows'])
+
+
+def columns(table, names, sheet='sheet'):
+    """Cells of the named header columns of a cached sheet, as ``SheetColumn`` arrays
+
+    Cells are stored column by column, so the cells of one column are a contiguous
+    run of the memory-mapped table: only that run is read, and no cell is converted
+    to a Python object.
+    """
+    import numpy as np
+
+    pa = _arrow()
+    positions = json.loads(table.schema.metadata[b'header'])
+    missing = [name for name in names if name not in positions]
+    if missing:
+        raise ValueError(f"Missing required column '{missing[0]}' in sheet '{sheet}'")
+
+    batches = [batch for batch in table.to_batches() if batch.num_rows]
+    bounds = [(batch.column('col')[0].as_py(), batch.column('col')[-1].as_py()) for batch in batches]
+    result = {}
+    for name in names:
+        c = positions[name]
+        parts = []
+        for batch, (first, last) in zip(batches, bounds):
+            if first <= c <= last:
+                start, stop = np.searchsorted(batch.column('col').to_numpy(), [c, c + 1])
+                part = batch.slice(start, stop - start)
+                row_ids = part.column('row').to_numpy()
+                skip = int(len(row_ids) > 0 and row_ids[0] == 0)  # The header cell
+                parts.append(part.slice(skip))
+        part = pa.Table.from_batches(parts, table.schema).combine_chunks() if parts else table.slice(0, 0)
+        result[name] = SheetColumn(part.column('row').to_numpy(),
+                                   part.column('kind').to_numpy(),
+                                   part.column('number').to_numpy(zero_copy_only=False),
+                                   part.column('text').combine_chunks())
+    return result
+
+
+def _value(kind, number, text):
+    if kind == _INTEGER:
+        return int(number)
+    if kind == _NUMBER:
+        return number
+    if kind == _BOOL:
+        return bool(number)
+    if kind == _DATETIME:
+        return datetime.datetime.fromisoformat(text)
+    return text
+
+
+def values(column):
+    """Cells of a ``SheetColumn`` as the Python values ``load`` puts in the rows"""
+    return [_value(kind, number, text) for kind, number, text in
+            zip(column.kinds.tolist(), column.numbers.tolist(), column.texts.to_pylist())]
+
+
+def load(key):
+    """Return the cached rows for a sheet key, or None on a miss"""
+    table = load_table(key)
+    if table is None:
+        return None
+
+    cells = table.to_pydict()  # Every cell as a Python object
+    rows = [[] for _ in range(height(table))]
+    for r, c, kind, number, text in zip(cells['row'], cells['col'], cells['kind'],
+                                        cells['number'], cells['text']):
+        row = rows[r]
+        if len(row) <= c:
+            row.extend([None] * (c + 1 - len(row)))
+        row[c] = _value(kind, number, text)
+    return rows
+
+
+def store(key, rows):
+    """Write a parsed sheet to the cache and enforce the size cap"""
+    if not enabled():
+        return
+    pa = _arrow()
+    row_ids, col_ids, kinds, numbers, texts = [], [], [], [], []
+    for r, row in enumerate(rows):
+        for c, value in enumerate(row):
+            if value is None:
+                continue
+            number, text = None, None
+            if isinstance(value, bool):
+                kind, number = _BOOL, float(value)
+            elif isinstance(value, int):
+                kind, number = _INTEGER, float(value)
+            elif isinstance(value, float):
+                kind, number = _NUMBER, value
+            elif isinstance(value, (datetime.datetime, datetime.date)):
+                kind, text = _DATETIME, value.isoformat()
+            else:
+                kind, text = _TEXT, str(value)
+            row_ids.append(r)
+            col_ids.append(c)
+            kinds.append(kind)
+            numbers.append(number)
+            texts.append(text)
+
+    table = pa.table({
+        'row': pa.array(row_ids, pa.int32()),
+        'col': pa.array(col_ids, pa.int16()),
+        'kind': pa.array(kinds, pa.int8()),
+        'number': pa.array(numbers, pa.float64()),
+        'text': pa.array(texts, pa.string()),
+    })
+    table = table.sort_by([('col', 'ascending'), ('row', 'ascending')])
+    # Trailing empty rows carry no cells, so the sheet height is stored as metadata, and
+    # so is the header, which would otherwise be spread over the column runs
+    header = {}
+    for c, name in enumerate(rows[0] if rows else []):
+        if isinstance(name, str):
+            header.setdefault(name, c)  # The first of repeated headers, as ``list.index``
+    table = table.replace_schema_metadata({'n_rows': str(len(rows)), 'header': json.dumps(header)})
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = _path(key) + f'.{os.getpid()}.tmp'
+    pa.feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, _path(key))
+    evict(keep=key)
+
+
+def evict(max_bytes=None, keep=None):
+    """Delete least recently used cache files until the directory fits the cap
+
+    The file of the key ``keep`` (the sheet just stored) is never deleted, even if it
+    alone is larger than the cap. Build workers evict concurrently, so files that
+    another process deleted in the meantime are skipped.
+    """
+    if max_bytes is None:
+        max_bytes = CACHE_SIZE_MB * 1024 * 1024
+    if not os.path.isdir(CACHE_DIR):
+        return
+    kept = os.path.basename(_path(keep)) if keep else None
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith('.feather'):
+            try:
+                stat = os.stat(os.path.join(CACHE_DIR, name))
+            except FileNotFoundError:
+                continue
+            if name == kept:
+                max_bytes -= stat.st_size  # Counts towards the cap, but stays
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(CACHE_DIR, name))
+        except FileNotFoundError:
+            pass
+        total -= size
@@ -0,0 +1,117 @@
+"""
+Sparse heatmap for large cross-tabulations (e.g. thousands of fine-grained domains x types).
+
+The cross table is built as a SciPy sparse matrix straight from category codes,
+rows and columns are ordered by totals (like the published heatmap) or by
+hierarchical clustering, and the matrix is drawn with a single ``imshow`` image.
+Only cells at or above a count threshold get a text annotation, so the number of
+text artists stays small no matter how large the table is.
+"""
+import numpy as np
+import pandas as pd
+
+MAX_TICK_LABELS = 80  # Axes with more categories than this are drawn without tick labels
+
+
+def sparse_crosstab(rows, cols, counts=None):
+    """Count co-occurrences of two categorical series as a sparse matrix
+
+    ``counts`` optionally gives the number of occurrences of each (row, col) pair,
+    e.g. for a table of pre-aggregated counts. Returns (matrix, row_labels,
+    col_labels) with the matrix in CSR format.
+    """
+    from scipy import sparse
+
+    row_codes, row_labels = pd.factorize(rows, sort=True)
+    col_codes, col_labels = pd.factorize(cols, sort=True)
+    valid = (row_codes >= 0) & (col_codes >= 0)
+    data = np.ones(valid.sum(), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)[valid]
+    matrix = sparse.coo_matrix(
+        (data, (row_codes[valid], col_codes[valid])),
+        shape=(len(row_labels), len(col_labels)),
+    ).tocsr()  # Duplicate (row, col) entries are summed
+    return matrix, np.asarray(row_labels), np.asarray(col_labels)
+
+
+def _cluster_order(matrix):
+    """Leaf order of an average-linkage clustering of the matrix rows"""
+    from scipy.cluster.hierarchy import leaves_list, linkage
+
+    if matrix.shape[0] < 3:
+        return np.arange(matrix.shape[0])
+    # Cluster on row profiles so that domains with similar type mixes end up together
+    dense = matrix.toarray().astype(float)
+    dense /= np.maximum(dense.sum(axis=1, keepdims=True), 1)
+    return leaves_list(linkage(dense, method='average', metric='euclidean'))
+
+
+def order_axes(matrix, order='totals'):
+    """Row and column permutation for the heatmap
+
+    ``'totals'`` sorts rows by descending and columns by ascending totals exactly like
+    the published heatmap: with ``sort_values`` on the totals of the label-sorted
+    table, so equal totals come out in the same order as in the dense heatmap.
+    ``'cluster'`` groups similar rows and columns together.
+    """
+    if order == 'totals':
+        row_totals = pd.Series(np.asarray(matrix.sum(axis=1)).ravel())
+        col_totals = pd.Series(np.asarray(matrix.sum(axis=0)).ravel())
+        return (row_totals.sort_values(ascending=False).index.to_numpy(),
+                col_totals.sort_values(ascending=True).index.to_numpy())
+    if order == 'cluster':
+        return _cluster_order(matrix), _cluster_order(matrix.T.tocsr())
+    raise ValueError(f"Unknown order '{order}', expected 'totals' or 'cluster'")
+
+
+def plot_heatmap(rows, cols, order='totals', annotate_min=1, cmap='YlGnBu', ax=None, counts=None):
+    """Draw the cross table of two categorical series as a sparse heatmap
+
+    ``counts`` optionally weights each (row, col) pair (see ``sparse_crosstab``).
+    Cells with a count of at least ``annotate_min`` are annotated with their value.
+    Returns (fig, ax).
+    """
+    import matplotlib.pyplot as plt
+
+    matrix, row_labels, col_labels = sparse_crosstab(rows, cols, counts)
+    row_order, col_order = order_axes(matrix, order)
+    matrix = matrix[row_order][:, col_order]
+    row_labels, col_labels = row_labels[row_order], col_labels[col_order]
+    n_rows, n_cols = matrix.shape
+
+    if ax is None:
+        fig, ax = plt.subplots(figsize=(max(6, 0.6 * n_cols + 4), min(max(6, 0.25 * n_rows + 2), 40)))
+    else:
+        fig = ax.figure
+
+    # One image for the whole table; empty cells are left blank
+    image = ax.imshow(np.ma.masked_equal(matrix.toarray(), 0), cmap=cmap, aspect='auto',
+                      interpolation='nearest')
+    cbar = fig.colorbar(image, ax=ax, pad=0.01)
+    cbar.ax.set_ylabel('frequency of occurrence', rotation=270, labelpad=15)
+
+    # Annotate only the stored (non-zero) cells above the threshold
+    cells = matrix.tocoo()
+    shown = cells.data >= annotate_min
+    vmax = cells.data.max() if cells.nnz else 1
+    for r, c, value in zip(cells.row[shown].tolist(), cells.col[shown].tolist(), cells.data[shown].tolist()):
+        ax.text(c, r, f"{value}", ha='center', va='center', fontsize=8,
+                color='white' if value > vmax / 2 else 'black')
+
+    # Category labels with their totals
+    row_totals = np.asarray(matrix.sum(axis=1)).ravel()
+    col_totals = np.asarray(matrix.sum(axis=0)).ravel()
+    ax.xaxis.tick_top()
+    if n_cols <= MAX_TICK_LABELS:
+        ax.set_xticks(range(n_cols))
+        ax.set_xticklabels([f"{label} ({total})" for label, total in zip(col_labels, col_totals)],
+                           rotation=45, ha='left')
+    else:
+        ax.set_xticks([])
+    if n_rows <= MAX_TICK_LABELS:
+        ax.set_yticks(range(n_rows))
+        ax.set_yticklabels([f"{label} ({total})" for label, total in zip(row_labels, row_totals)])
+    else:
+        ax.set_yticks([])
+        ax.set_ylabel(f"{n_rows} categories")
+
+    return fig, ax
@@ -0,0 +1,97 @@
+"""
+Shared colors, fonts and matplotlib settings of the figures, set up once per process.
+
+The figures share one palette, the light navy blue ``#3E87BA`` and its lighter and
+darker shades, plus a few text and grid colors. ``apply()`` sets the common rcParams
+and ``preload()`` warms what matplotlib otherwise sets up on first use in every
+process: the font lookups (``findfont`` and the FreeType font files) of the families
+and weights the figures use. Both run once per process, so ``mbre_plots.py``
+workers pay for them before their first figure and every later figure in the batch
+starts warm. The chart palettes (``SLICE_COLORS``, ``LEVEL_COLORS``) are drawn from
+``BLUES``.
+
+Generated color ramps and colormaps are memoized by their arguments, so renderers
+that draw many per-topic or per-venue figures in one batch compute each ramp once.
+"""
+import functools
+
+PRIMARY = '#3E87BA'  # Light navy blue, the main color of every chart
+# The blues of the charts, sorted by CIE lightness L* from 92 to 32; they mix grayish,
+# cyan and sky blues, so neighbouring shades are not an even ramp of one hue
+BLUES = ['#DCEAF5', '#A0D2F5', '#ADC6E5', '#9AC9DB', '#7EB9DE', '#5FB1ED', '#5DA0C7', PRIMARY, '#0B4F7C']
+SLICE_COLORS = (PRIMARY, BLUES[6], BLUES[4], BLUES[1])  # Pie slices, largest (darkest) first
+LEVEL_COLORS = (BLUES[2], BLUES[5], PRIMARY)  # Answer levels, from "not" (lightest) to "yes"
+TEXT_COLOR = '#2F2F2F'  # Dark gray
+GRID_COLOR = 'lightgray'
+GRID_LINESTYLE = '--'
+
+RC_PARAMS = {
+    'axes.unicode_minus': False,  # Plain hyphen as minus sign
+}
+# (family, weight) of the fonts the figures use (DejaVu Sans has no semibold; it falls back to bold)
+FONTS = [
+    ('sans-serif', 'normal'),
+    ('sans-serif', 'bold'),
+    ('serif', 'normal'),
+]
+
+_applied = False
+_preloaded = False
+
+
+def apply():
+    """Set the shared rcParams and warm the caches (once per process)"""
+    global _applied
+    if not _applied:
+        import matplotlib
+
+        matplotlib.rcParams.update(RC_PARAMS)
+        _applied = True
+    preload()
+
+
+def preload():
+    """Resolve the fonts ahead of the first figure"""
+    global _preloaded
+    if _preloaded:
+        return
+    from matplotlib import font_manager
+
+    for family, weight in FONTS:
+        # findfont caches the lookup, get_font the parsed font file
+        path = font_manager.findfont(font_manager.FontProperties(family=family, weight=weight))
+        font_manager.get_font(path)
+    _preloaded = True
+
+
+def colormap(colors, name='mbre'):
+    """Linear colormap through a sequence of colors (a list is fine)"""
+    return _colormap(tuple(colors), name)
+
+
+@functools.lru_cache(maxsize=None)
+def _colormap(colors, name):
+    from matplotlib.colors import LinearSegmentedColormap
+
+    return LinearSegmentedColormap.from_list(name, colors)
+
+
+@functools.lru_cache(maxsize=None)
+def color_ramp(num_colors):
+    """Low-key shades of blue for ``num_colors`` categories, as hex strings
+
+    Lightness steps through five levels and saturation drops after every five
+    colors, so neighbouring categories stay distinguishable.
+    """
+    import colorsys
+
+    from matplotlib.colors import rgb2hex
+
+    base_hue = 210 / 360  # Blue color system
+    base_saturation = 0.7
+    colors = []
+    for i in range(num_colors):
+        lightness = 0.9 - (i % 5) * 0.15  # Vary between 0.9-0.3
+        saturation = base_saturation - (i // 5) * 0.1  # Down to 0.3
+        colors.append(rgb2hex(colorsys.hls_to_rgb(base_hue, lightness, max(0.3, saturation))))
+    return tuple(colors)
@@ -0,0 +1,44 @@
+"""
+Many text labels drawn by one matplotlib artist.
+
+``ax.text`` adds one ``Text`` artist per label, and every artist is drawn, laid out
+and measured (``tight_layout``, ``bbox_inches='tight'``) on its own, which makes
+charts with hundreds of value labels slow to render. ``TextBatch`` keeps the label
+positions and strings in lists and draws them all with a single reused ``Text``,
+so the labels look exactly like ``ax.text`` labels with the same properties but
+cost one artist.
+"""
+from matplotlib.artist import Artist, allow_rasterization
+from matplotlib.text import Text
+
+
+class TextBatch(Artist):
+    """Text labels at data positions, drawn by one artist"""
+
+    def __init__(self, xs, ys, texts, **text_kwargs):
+        super().__init__()
+        self._labels = list(zip(xs, ys, texts))
+        self._text = Text(0, 0, '', **text_kwargs)
+        self.set_zorder(self._text.get_zorder())
+        self.set_in_layout(False)  # Labels placed inside the axes do not change the layout
+
+    @allow_rasterization
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        text = self._text
+        text.set_figure(self.figure)
+        text.set_transform(self.get_transform())
+        for x, y, label in self._labels:
+            text.set_position((x, y))
+            text.set_text(label)
+            text.draw(renderer)
+        self.stale = False
+
+
+def add_texts(ax, xs, ys, texts, **text_kwargs):
+    """Add labels at data positions to an axes, like ``ax.text`` for each, as one artist"""
+    batch = TextBatch(xs, ys, texts, **text_kwargs)
+    ax.add_artist(batch)
+    batch.set_clip_path(None)  # Like ``ax.text`` labels, which are not clipped to the axes
+    return batch
@@ -0,0 +1,161 @@
+"""
+Paper counts per category (e.g. topic) over year bins or rolling year windows.
+
+The topic trend chart used to cut the papers into hard-coded 5-year ranges with
+``pd.cut`` and group them again, so papers outside the ranges (e.g. from 2025 on)
+were silently dropped and any other granularity meant editing the code. Here the
+papers per year and category, a roll-up of the count cube (see ``cube.py``), are
+turned once into a cumulative-sum array over consecutive years: row i holds the
+papers of all years before ``years[i]``. The papers of any year span [a, b) are then
+the difference of two rows, so all bins or all rolling windows come out of a single
+vectorized subtraction, and switching granularity reuses the same array instead
+of re-reading or re-grouping the papers.
+
+Bins are left-closed and right-open. By default they are ``BIN_WIDTH`` years wide,
+start at the first year and extend past the last one, so no paper is left out; the
+last of these bins is labeled up to the last year with papers. Explicit bin edges
+are labeled exactly as given.
+
+Usage:
+    python trends.py                      # topic counts per 5-year bin
+    python trends.py -w 3                 # 3-year rolling windows, one ending in every year
+    python trends.py -b 2010 2018 2026    # explicit bin edges
+"""
+import argparse
+from typing import NamedTuple
+
+BIN_WIDTH = 5  # Years per bin of the default bins
+
+
+class YearCounts(NamedTuple):
+    """Cumulative paper counts per year and category"""
+    years: object  # First to last year, consecutive
+    categories: object  # pandas Index of the categories
+    cumulative: object  # (years + 1, categories); row i counts the papers before years[i]
+
+
+class Trend(NamedTuple):
+    """Paper counts per category in a sequence of year windows"""
+    labels: list  # One label per window, e.g. '2010-2014'
+    categories: object  # pandas Index of the categories
+    counts: object  # (categories, windows)
+    excluded: int  # Papers in none of the windows
+
+
+def year_counts(counts, years, categories):
+    """Cumulative counts of a (years, categories) count matrix; gaps between years count 0"""
+    import numpy as np
+    import pandas as pd
+
+    years = np.asarray(years, dtype=np.int64)
+    span = np.arange(years.min(), years.max() + 1) if len(years) else np.arange(0)
+    dense = np.zeros((len(span), len(categories)), dtype=np.int64)
+    dense[years - (span[0] if len(span) else 0)] = counts
+    cumulative = np.zeros((len(span) + 1, len(categories)), dtype=np.int64)
+    np.cumsum(dense, axis=0, out=cumulative[1:])
+    return YearCounts(span, pd.Index(categories), cumulative)
+
+
+def from_table(table, year_column, category_column, count_column=None):
+    """Cumulative counts of a long table
+
+    The table has one row per paper, or one row per year and category with the
+    number of papers in ``count_column`` (e.g. a count cube roll-up).
+    """
+    table = table.dropna(subset=[year_column, category_column])
+    matrix = table.pivot_table(index=year_column, columns=category_column, values=count_column,
+                               aggfunc='sum' if count_column else 'size', fill_value=0, observed=True)
+    return year_counts(matrix.to_numpy(), matrix.index.astype(int), matrix.columns)
+
+
+def from_cube(count_cube, dimension='Topic'):
+    """Cumulative counts per year and value of a count cube dimension"""
+    import cube
+
+    labels = dict(zip(count_cube.dimensions, count_cube.labels))
+    counts = cube.rollup(count_cube, ['Year', dimension])
+    # Only years with papers that have a value in the dimension, as in ``from_table``
+    observed = counts.sum(axis=1) > 0
+    return year_counts(counts[observed], labels['Year'][observed], labels[dimension])
+
+
+def _label(start, end):
+    return f"{start}-{end}" if end > start else f"{start}"
+
+
+def bin_edges(yearly, width=BIN_WIDTH, start=None):
+    """Edges of ``width``-year bins from ``start`` (default: the first year) past the last year"""
+    import numpy as np
+
+    if not len(yearly.years):
+        return []
+    start = int(yearly.years[0]) if start is None else start
+    n_bins = max(1, -(-(int(yearly.years[-1]) + 1 - start) // width))
+    return (start + width * np.arange(n_bins + 1)).tolist()
+
+
+def binned(yearly, edges, clip_labels=False):
+    """Paper counts per category in the bins [edges[i], edges[i + 1])
+
+    Bins are labeled with the years they cover, as given by the edges; with
+    ``clip_labels`` (generated edges) the bin holding the last year with papers is
+    labeled up to that year instead.
+    """
+    import numpy as np
+
+    edges = np.asarray(edges, dtype=np.int64)
+    if len(edges) < 2 or (np.diff(edges) <= 0).any():
+        raise ValueError(f"Bin edges must be at least two increasing years, got {edges.tolist()}")
+    first = yearly.years[0] if len(yearly.years) else 0
+    last = yearly.years[-1] if len(yearly.years) else 0
+    rows = np.clip(edges - first, 0, len(yearly.years))
+    counts = yearly.cumulative[rows[1:]] - yearly.cumulative[rows[:-1]]
+    labels = [_label(start, last if clip_labels and start <= last < end - 1 else end - 1)
+              for start, end in zip(edges[:-1].tolist(), edges[1:].tolist())]
+    excluded = int(yearly.cumulative[-1].sum() - counts.sum())
+    return Trend(labels, yearly.categories, counts.T, excluded)
+
+
+def rolling(yearly, window):
+    """Paper counts per category in the ``window``-year windows ending in every year"""
+    import numpy as np
+
+    if window < 1 or window > len(yearly.years):
+        raise ValueError(f"Window must be 1 to {len(yearly.years)} years, got {window}")
+    ends = np.arange(window, len(yearly.years) + 1)  # Cumulative row after each window
+    counts = yearly.cumulative[ends] - yearly.cumulative[ends - window]
+    labels = [_label(int(yearly.years[end - window]), int(yearly.years[end - 1])) for end in ends.tolist()]
+    return Trend(labels, yearly.categories, counts.T, 0)
+
+
+def trend(yearly, edges=None, window=None, width=BIN_WIDTH):
+    """Rolling windows if ``window`` is given, else bins (default: ``width``-year bins)"""
+    if window:
+        return rolling(yearly, window)
+    if edges is None:
+        return binned(yearly, bin_edges(yearly, width), clip_labels=True)
+    return binned(yearly, edges)
+
+
+def main(argv=None):
+    """Command line entry point"""
+    import pandas as pd
+
+    import cube
+
+    parser = argparse.ArgumentParser(description='Paper counts per topic (or other dimension) over time.')
+    parser.add_argument('-d', '--dimension', default='Topic', choices=[d for d in cube.DIMENSIONS if d != 'Year'])
+    parser.add_argument('-b', '--bins', nargs='+', type=int, metavar='YEAR', help='Bin edges')
+    parser.add_argument('--width', type=int, default=BIN_WIDTH, help=f'Years per bin (default: {BIN_WIDTH})')
+    parser.add_argument('-w', '--window', type=int, help='Years per rolling window (instead of bins)')
+    args = parser.parse_args(argv)
+
+    result = trend(from_cube(cube.load_cube(), args.dimension), args.bins, args.window, args.width)
+    print(pd.DataFrame(result.counts, index=result.categories.rename(args.dimension),
+                       columns=result.labels).to_string())
+    if result.excluded:
+        print(f'{result.excluded} papers outside the bins')
+
+
+if __name__ == '__main__':
+    main()
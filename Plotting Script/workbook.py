@@ -0,0 +1,396 @@
+"""
+Shared loader for the master workbook.
+
+Every figure used to read its own table from ``Data Table/``, and those tables were
+copied by hand from ``Paper Screening and Data Extraction.xlsx``. This module opens
+the master workbook once, streams only the sheets the requested figures need and
+derives each figure's table in memory, with the same columns as the old split tables.
+Parsed sheets are kept for the lifetime of the process, so building several figures
+in one run costs a single parse, and sheets are also cached on disk between runs
+(see ``sheet_cache.py``) so an unchanged sheet is never parsed twice. Tables of
+per-paper and per-author columns are built from column projections of the typed
+paper and author tables in ``papers.py``.
+
+pandas and NumPy are imported when the first table is built, so modules that only
+need the sheet names or dependency tracking (e.g. ``screening.py``) start quickly.
+"""
+import os
+from typing import NamedTuple
+
+import profiling
+import sheet_cache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MASTER_WORKBOOK = os.path.normpath(os.path.join(BASE_DIR, os.pardir, 'Paper Screening and Data Extraction.xlsx'))
+
+# Sheet names in the master workbook
+SELECTED_SHEET = 'ordering (selected papers)'
+DOMAIN_TYPE_SHEET = 'domain-type'
+TOPIC_TRENDS_SHEET = 'topic trends'
+TECHNOLOGY_SHEET = 'technology'
+EVALUATION_SHEET = 'evaluation'
+AUTHOR_DATA_SHEET = 'All Author Data'
+
+PIVOT_TOTAL = '总计'  # Grand total row written by Excel pivot tables
+
+# Publication type labels used in the paper, in chart order
+ITEM_TYPE_LABELS = {
+    'conferencePaper': 'Conference',
+    'journalArticle': 'Journal',
+    'workshopPaper': 'Workshop',
+    'bookSection': 'Chapter of Book',
+}
+
+# Publishers shown individually; everything else is grouped as "Other"
+MAJOR_PUBLISHERS = ['IEEE', 'Springer', 'Elsevier']
+PUBLISHER_ALIASES = {'IEEE/ACM': 'IEEE'}
+OTHER_PUBLISHER = 'Other'
+
+# Quality criteria (column in the "evaluation" sheet) and answer levels
+QUALITY_CRITERIA = {
+    'QC1': 'Context',
+    'QC2': 'Objective',
+    'QC3': 'Procedure',
+    'QC4': 'Validation',
+    'QC5': 'Limitation',
+    'QC6': 'Future Work',
+}
+QUALITY_LEVELS = {0: 'Not', 0.5: 'To some extend', 1: 'Yes'}
+
+TECHNOLOGY_COLUMNS = ['Technologies', 'Learnability', 'Expressiveness', 'Collaboration',
+                      'Toolchain', 'Scalability', 'Cost & Resources']
+
+# ISO country codes used in the author data and their chart labels
+COUNTRY_NAMES = {
+    'AT': 'Austria', 'AU': 'Australia', 'BE': 'Belgium', 'BH': 'Bahrain', 'BR': 'Brazil',
+    'CA': 'Canada', 'CH': 'Switzerland', 'CN': 'China', 'DE': 'Germany', 'DK': 'Denmark',
+    'EC': 'Ecuador', 'ES': 'Spain', 'FI': 'Finland', 'FR': 'France', 'GB': 'UK',
+    'GR': 'Greece', 'ID': 'Indonesia', 'IL': 'Israel', 'IN': 'India', 'IR': 'Iran',
+    'IS': 'Iceland', 'IT': 'Italy', 'LU': 'Luxembourg', 'MG': 'Madagascar', 'MO': 'Macao',
+    'NL': 'Netherlands', 'PK': 'Pakistan', 'PL': 'Poland', 'PT': 'Portugal', 'QA': 'Qatar',
+    'RO': 'Romania', 'RU': 'Russia', 'SA': 'Saudi Arabia', 'SE': 'Sweden', 'TH': 'Thailand',
+    'TN': 'Tunisia', 'TT': 'Trinidad and Tobago', 'US': 'USA',
+}
+
+# Spelling of the extracted topics as printed in the topic trend chart
+TOPIC_LABELS = {
+    'security requirement': 'security requirements',
+    'agile requirement engineering': 'agile requirements engineering',
+    'goal-oriented requirement engineering': 'goal-oriented requirements engineering',
+    'requirement change': 'requirements change',
+}
+
+REGION_MIN_SCORE = 1  # The region chart only shows regions with a fractional score of at least 1
+AFFILIATION_SEPARATOR = ';'  # Separates the countries/institutions of one author
+
+# Parsed sheets: absolute workbook path -> (modification time, {sheet name: rows})
+_parsed = {}
+
+# Names of the sheets requested since the last reset, used for build dependency tracking
+accessed_sheets = set()
+# Other data files read since the last reset (e.g. abstract.txt), tracked the same way
+accessed_files = set()
+
+
+@profiling.profiled('load')
+def read_sheets(sheet_names, workbook_path=MASTER_WORKBOOK):
+    """Return the raw rows of the requested sheets, parsing each sheet at most once"""
+    accessed_sheets.update(sheet_names)
+    path = os.path.abspath(workbook_path)
+    mtime = os.path.getmtime(path)
+    if path not in _parsed or _parsed[path][0] != mtime:
+        _parsed[path] = (mtime, {})
+    sheets = _parsed[path][1]
+
+    missing = [name for name in sheet_names if name not in sheets]
+    keys = sheet_cache.sheet_keys(path) if missing and sheet_cache.enabled() else {}
+    for name in list(missing):
+        rows = sheet_cache.load(keys[name]) if name in keys else None
+        if rows is not None:
+            sheets[name] = rows
+            missing.remove(name)
+
+    for name, rows in _parse(path, missing, keys):
+        sheets[name] = rows
+    return {name: sheets[name] for name in sheet_names}
+
+
+def _parse(path, sheet_names, keys):
+    """Parse sheets of a workbook into raw rows, storing those with a key in the sheet cache"""
+    if not sheet_names:
+        return
+    # Read-only mode streams the sheet XML row by row instead of building the full cell model
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for name in sheet_names:
+            ws = wb[name]
+            ws.reset_dimensions()  # Some sheets carry a stale dimension tag
+            rows = [list(row) for row in ws.iter_rows(values_only=True)]
+            if name in keys:
+                sheet_cache.store(keys[name], rows)
+            yield name, rows
+    finally:
+        wb.close()
+
+
+def read_tables(sheet_names, workbook_path=MASTER_WORKBOOK):
+    """Return the requested sheets as memory-mapped Arrow tables of the sheet cache
+
+    Sheets missing from the cache are parsed and stored first. Unlike ``read_sheets``
+    no row lists are kept, so column projections (see ``papers.py``) never hold a
+    whole sheet as Python objects. Returns None when the cache is disabled or cannot
+    be written.
+    """
+    if not sheet_cache.enabled():
+        return None
+    accessed_sheets.update(sheet_names)
+    path = os.path.abspath(workbook_path)
+    keys = sheet_cache.sheet_keys(path)
+    tables = {name: sheet_cache.load_table(keys[name]) for name in sheet_names}
+    for name, _ in _parse(path, [name for name, table in tables.items() if table is None], keys):
+        tables[name] = sheet_cache.load_table(keys[name])
+    return None if any(table is None for table in tables.values()) else tables
+
+
+def clear_cache():
+    """Drop all sheets parsed in this process (the on-disk cache is kept)"""
+    _parsed.clear()
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _block(rows, first_header, width, columns=None):
+    """Cut a table that starts anywhere in a sheet (pivot tables, side tables)
+
+    The table begins at the first cell equal to ``first_header`` and ends at the first
+    row whose key cell is blank or a pivot grand total.
+    """
+    import pandas as pd
+
+    for r, row in enumerate(rows):
+        if first_header in row:
+            c = row.index(first_header)
+            break
+    else:
+        raise ValueError(f"Table header '{first_header}' not found")
+
+    data = []
+    for row in rows[r + 1:]:
+        values = list(row[c:c + width]) + [None] * max(0, c + width - len(row))
+        if _is_blank(values[0]) or values[0] == PIVOT_TOTAL:
+            break
+        data.append(values)
+    return pd.DataFrame(data, columns=columns or list(rows[r][c:c + width]))
+
+
+def _count_table(series, category_column, order=None):
+    """Count papers per category as a two-column table"""
+    counts = series.value_counts()
+    if hasattr(series.dtype, 'categories'):
+        # Counted on the codes; keep the observed categories, as labels of their plain type
+        counts = counts[counts > 0]
+        counts.index = counts.index.astype(series.dtype.categories.dtype)
+    return _counts_table(counts, category_column, order)
+
+
+def _counts_table(counts, category_column, order=None):
+    """Two-column table of paper counts indexed by category (e.g. a count cube roll-up)"""
+    counts = counts.reindex(order, fill_value=0) if order is not None else counts.sort_index()
+    return counts.rename_axis(category_column).reset_index(name='Number of papers')
+
+
+def fractional_scores(authors, unit_column, paper_column='Original_DOI', separator=AFFILIATION_SEPARATOR):
+    """Fractional counting of papers per affiliation unit (country, institution)
+
+    ``authors`` has one row per paper and author. Every paper is worth 1, split evenly
+    across its authors, and each author's share is split evenly across the units
+    listed for them (e.g. "RO; PK"). Returns the units with their summed score and the
+    number of distinct papers they contributed to, highest score first.
+    """
+    import numpy as np
+    import pandas as pd
+
+    authors = authors[[paper_column, unit_column]].dropna()
+    paper_codes, paper_labels = pd.factorize(authors[paper_column])
+    n_papers = len(paper_labels)
+    author_share = 1 / np.bincount(paper_codes)[paper_codes]
+
+    # One row per (author, unit), each carrying its part of the author's share
+    units = authors[unit_column].astype(str).str.split(separator)
+    unit_counts = units.str.len().to_numpy()
+    units = units.explode().str.strip()
+    credit = np.repeat(author_share / unit_counts, unit_counts)
+    papers = np.repeat(paper_codes, unit_counts)
+    valid = (units != '').to_numpy()
+
+    unit_codes, unit_labels = pd.factorize(units[valid])
+    scores = np.bincount(unit_codes, weights=credit[valid], minlength=len(unit_labels))
+    # Distinct papers per unit from the unique (unit, paper) code pairs
+    pairs = np.unique(unit_codes.astype(np.int64) * n_papers + papers[valid])
+    paper_counts = np.bincount(pairs // n_papers, minlength=len(unit_labels))
+
+    table = pd.DataFrame({unit_column: unit_labels, 'Score': scores, 'Number of papers': paper_counts})
+    # Highest score first, ties in descending name order as in the Excel pivot tables;
+    # rounding keeps float noise from breaking ties
+    table['_order'] = table['Score'].round(9)
+    table = table.sort_values(['_order', unit_column], ascending=False, kind='stable')
+    return table.drop(columns='_order').reset_index(drop=True)
+
+
+def _publication_year(sheets):
+    import cube
+
+    return _counts_table(cube.series(cube.from_sheets(sheets, ['Year']), 'Year'), 'Publication Year')
+
+
+def _publication_type(sheets):
+    import cube
+
+    counts = cube.series(cube.from_sheets(sheets, ['Item Type']), 'Item Type')
+    counts = counts.groupby(counts.index.map(ITEM_TYPE_LABELS)).sum()  # Unlabeled item types are dropped
+    return _counts_table(counts, 'Publication Type', order=list(ITEM_TYPE_LABELS.values()))
+
+
+def _publisher_group(publisher):
+    publisher = PUBLISHER_ALIASES.get(publisher, publisher)
+    return publisher if publisher in MAJOR_PUBLISHERS else OTHER_PUBLISHER
+
+
+def _publisher(sheets):
+    import cube
+
+    counts = cube.series(cube.from_sheets(sheets, ['Publisher']), 'Publisher')
+    counts = counts.groupby(counts.index.map(_publisher_group)).sum()
+    # Major publishers by paper count, "Other" always last
+    order = sorted(MAJOR_PUBLISHERS, key=lambda p: -counts.get(p, 0)) + [OTHER_PUBLISHER]
+    return _counts_table(counts, 'Publisher', order=order)
+
+
+def _score_distribution(sheets):
+    import papers
+
+    return _count_table(papers.paper_table(sheets, ['Score'])['Score'], 'Score')
+
+
+def _score_details(sheets):
+    import pandas as pd
+
+    import papers
+
+    answers = papers.paper_table(sheets, list(QUALITY_CRITERIA.values()))
+    rows = []
+    for qc, column in QUALITY_CRITERIA.items():
+        # Papers per answer level; answers outside QUALITY_LEVELS are not counted
+        counts = _count_table(answers[column], 'Level').set_index('Level')['Number of papers']
+        rows.append([qc, *(int(counts.get(level, 0)) for level in QUALITY_LEVELS)])
+    return pd.DataFrame(rows, columns=['Dimension', *QUALITY_LEVELS.values()])
+
+
+def _technology_score(sheets):
+    return _block(sheets[TECHNOLOGY_SHEET], TECHNOLOGY_COLUMNS[0], len(TECHNOLOGY_COLUMNS))
+
+
+def _domain_type(sheets):
+    import papers
+
+    return papers.decode(papers.paper_table(sheets, ['Type', 'Domain']))
+
+
+def _domain_type_counts(sheets):
+    import cube
+
+    return cube.frame(cube.from_sheets(sheets, ['Domain', 'Type']), ['Domain', 'Type'])
+
+
+def _domain_trends(sheets):
+    import cube
+
+    return cube.frame(cube.from_sheets(sheets, ['Year', 'Domain']), ['Year', 'Domain']).rename(
+        columns={'Year': 'Publication Year'})
+
+
+def _topic_trends(sheets):
+    import cube
+
+    return cube.frame(cube.from_sheets(sheets, ['Year', 'Topic']), ['Year', 'Topic']).rename(
+        columns={'Year': 'Publication Year'})
+
+
+def _region(sheets):
+    import papers
+
+    authors = papers.author_table(sheets, ['Paper', 'Countries'])
+    df = fractional_scores(authors, 'Countries', paper_column='Paper').rename(columns={'Countries': 'Region_old'})
+    df = df[df['Score'] >= REGION_MIN_SCORE].reset_index(drop=True)
+    df.insert(1, 'Region', df['Region_old'].map(COUNTRY_NAMES).fillna(df['Region_old']))
+    return df
+
+
+def _institution_score(sheets):
+    import papers
+
+    authors = papers.author_table(sheets, ['Paper', 'Institutions'])
+    return fractional_scores(authors, 'Institutions', paper_column='Paper').rename(
+        columns={'Institutions': 'Institution'})
+
+
+class CubeDimensions(NamedTuple):
+    """Count cube dimensions a table is rolled up from, standing for the sheets they come from"""
+    names: tuple
+
+
+# Figure table name -> (sheets it needs, builder); see ``table_sheets``
+TABLES = {
+    'Publication Year': (CubeDimensions(('Year',)), _publication_year),
+    'Publication Type': (CubeDimensions(('Item Type',)), _publication_type),
+    'Publisher': (CubeDimensions(('Publisher',)), _publisher),
+    'Score Distribution': ([SELECTED_SHEET, EVALUATION_SHEET], _score_distribution),
+    'Score Details': ([SELECTED_SHEET, EVALUATION_SHEET], _score_details),
+    'Technology Score': ([TECHNOLOGY_SHEET], _technology_score),
+    'Domain-Type': ([SELECTED_SHEET, DOMAIN_TYPE_SHEET], _domain_type),
+    'Domain-Type Counts': (CubeDimensions(('Domain', 'Type')), _domain_type_counts),
+    'Domain Trends': (CubeDimensions(('Year', 'Domain')), _domain_trends),
+    'Topic Trends': (CubeDimensions(('Year', 'Topic')), _topic_trends),
+    'Region_new': ([AUTHOR_DATA_SHEET], _region),
+    'Institution Score': ([AUTHOR_DATA_SHEET], _institution_score),
+}
+
+
+def table_sheets(name):
+    """Sheets a figure table is built from
+
+    Cube tables only read the sheets of their own dimensions (``papers.sheets_for``),
+    so e.g. editing the topic trends sheet does not make the publisher chart stale.
+    """
+    sheets = TABLES[name][0]
+    if isinstance(sheets, CubeDimensions):
+        import papers  # Not at the top: papers builds its column registry from this module
+        return papers.sheets_for(sheets.names)
+    return list(sheets)
+
+
+def load_tables(names=None, workbook_path=MASTER_WORKBOOK):
+    """Load several figure tables with one pass over the workbook"""
+    names = list(TABLES) if names is None else list(names)
+    unknown = [name for name in names if name not in TABLES]
+    if unknown:
+        raise KeyError(f"Unknown table(s): {unknown}")
+
+    needed = []
+    for name in names:
+        needed += [s for s in table_sheets(name) if s not in needed]
+    sheets = read_sheets(needed, workbook_path)
+
+    tables = {}
+    for name in names:
+        with profiling.stage('transform'):
+            tables[name] = TABLES[name][1](sheets)
+    return tables
+
+
+def load_table(name, workbook_path=MASTER_WORKBOOK):
+    """Load a single figure table"""
+    return load_tables([name], workbook_path)[name]